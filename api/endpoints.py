@@ -1,12 +1,14 @@
 """
 FastAPI endpoints for invoice automation
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, AsyncIterator, Union
+import orjson
 from pydantic import BaseModel
 
+from config import settings
 from services.processor import InvoiceProcessor
-from database.client import run_query
 from logs.log import logger
 
 
@@ -21,11 +23,6 @@ class InvoiceProcessRequest(BaseModel):
     static: Dict[str, Any]
 
 
-class BatchInvoiceProcessRequest(BaseModel):
-    """Request model for processing multiple invoices"""
-    invoices: List[InvoiceProcessRequest]
-
-
 class InvoiceProcessResponse(BaseModel):
     """Response model for invoice processing"""
     status: str
@@ -37,10 +34,36 @@ class InvoiceProcessResponse(BaseModel):
     errors: List[str] = []
 
 
-# Initialize processor (will be created per request)
-def get_processor() -> InvoiceProcessor:
-    """Get invoice processor instance"""
-    return InvoiceProcessor(run_query)
+# Shared processor created once at application startup
+def get_processor(request: Request) -> InvoiceProcessor:
+    """Get the application-wide invoice processor instance"""
+    return request.app.state.processor
+
+
+async def _ndjson_results(
+    entries: AsyncIterator[Dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    """
+    Encode batch results as NDJSON, ending with a summary line
+    
+    Counts are kept while the entries stream, so the summary costs no
+    extra pass over the results.
+    """
+    total = successful = 0
+    async for entry in entries:
+        total += 1
+        if entry["status"] == "success":
+            successful += 1
+        yield orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    
+    logger.info(
+        "Batch processing completed: total=%d, successful=%d, failed=%d",
+        total, successful, total - successful
+    )
+    yield orjson.dumps(
+        {"summary": {"total": total, "successful": successful, "failed": total - successful}},
+        option=orjson.OPT_APPEND_NEWLINE
+    )
 
 
 @router.post(
@@ -50,12 +73,16 @@ def get_processor() -> InvoiceProcessor:
     summary="Process single invoice from OCR data",
     description="Process OCR-extracted invoice data and insert into database tables"
 )
-async def process_invoice(request: InvoiceProcessRequest) -> InvoiceProcessResponse:
+async def process_invoice(
+    request: InvoiceProcessRequest,
+    processor: InvoiceProcessor = Depends(get_processor)
+) -> InvoiceProcessResponse:
     """
     Process single invoice from OCR data
     
     Args:
         request: Invoice data with dynamic (lines) and static (header) fields
+        processor: Shared invoice processor
         
     Returns:
         Processing result with GRN number and insertion details
@@ -64,10 +91,9 @@ async def process_invoice(request: InvoiceProcessRequest) -> InvoiceProcessRespo
         HTTPException: If processing fails
     """
     try:
-        logger.info("Received invoice processing request")
+        logger.debug("Received invoice processing request")
         
-        processor = get_processor()
-        result = await processor.process_invoice(request.dict())
+        result = await processor.process_invoice(request)
         
         if result["status"] == "failed":
             logger.error("Invoice processing failed: %s", result.get("errors"))
@@ -79,7 +105,7 @@ async def process_invoice(request: InvoiceProcessRequest) -> InvoiceProcessRespo
                 }
             )
         
-        logger.info("Invoice processed successfully: grn=%s", result.get("grn_number"))
+        logger.debug("Invoice processed successfully: grn=%s", result.get("grn_number"))
         return InvoiceProcessResponse(**result)
         
     except HTTPException:
@@ -96,42 +122,128 @@ async def process_invoice(request: InvoiceProcessRequest) -> InvoiceProcessRespo
     "/process/batch",
     status_code=status.HTTP_200_OK,
     summary="Process multiple invoices in batch",
-    description="Process multiple OCR-extracted invoices in a single batch"
+    description=(
+        "Process multiple OCR-extracted invoices in a single batch. "
+        "Results are streamed as newline-delimited JSON, one line per "
+        "invoice, in completion order."
+    )
 )
 async def process_batch_invoices(
-    request: BatchInvoiceProcessRequest
-) -> Dict[str, Any]:
+    invoices: List[InvoiceProcessRequest],
+    processor: InvoiceProcessor = Depends(get_processor)
+) -> StreamingResponse:
     """
     Process multiple invoices in batch
     
     Args:
-        request: List of invoices to process
+        invoices: Invoices to process, validated as one typed list
+        processor: Shared invoice processor
         
     Returns:
-        Batch processing summary
+        NDJSON stream of per-invoice results
     """
-    try:
-        logger.info("Received batch processing request for %d invoices", len(request.invoices))
-        
-        processor = get_processor()
-        invoice_list = [invoice.dict() for invoice in request.invoices]
-        
-        results = await processor.process_batch_invoices(invoice_list)
+    logger.info("Received batch processing request for %d invoices", len(invoices))
+    
+    results = processor.iter_batch_invoices(invoices)
+    return StreamingResponse(_ndjson_results(results), media_type="application/x-ndjson")
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies produced while the request is still read
+    
+    StreamingResponse listens for client disconnect on receive() while it
+    streams, which would swallow the request body chunks read lazily by
+    the generator. Here receive() is left to the request; a disconnect
+    then surfaces as ClientDisconnect from request.stream().
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
         
-        logger.info(
-            "Batch processing completed: %d/%d successful",
-            results["successful"],
-            results["total"]
-        )
+        if self.background is not None:
+            await self.background()
+
+
+async def _ndjson_lines(
+    request: Request,
+    max_line_bytes: int
+) -> AsyncIterator[Union[bytes, ValueError]]:
+    """
+    Split a streamed request body into non-empty NDJSON lines
+    
+    Only each new chunk is scanned for newlines; the unfinished line is
+    kept as pieces and joined once complete. A line longer than
+    max_line_bytes is dropped while it is read and a ValueError stands in
+    for it, so it is reported as a failed entry (the response has already
+    started, too late for a 413) and the rest of the batch still runs.
+    """
+    partial: List[bytes] = []
+    partial_size = 0
+    skipping = False
+    
+    async for chunk in request.stream():
+        *ends, rest = chunk.split(b"\n")
+        for end in ends:
+            if skipping:
+                skipping = False
+            else:
+                line = b"".join(partial) + end if partial else end
+                if len(line) > max_line_bytes:
+                    yield ValueError(f"NDJSON line exceeds {max_line_bytes} bytes")
+                elif line.strip():
+                    yield line
+            partial.clear()
+            partial_size = 0
         
-        return results
+        if skipping or not rest:
+            continue
+        partial_size += len(rest)
+        if partial_size > max_line_bytes:
+            yield ValueError(f"NDJSON line exceeds {max_line_bytes} bytes")
+            skipping = True
+            partial.clear()
+            partial_size = 0
+        else:
+            partial.append(rest)
+    
+    if partial:
+        line = b"".join(partial)
+        if line.strip():
+            yield line
+
+
+@router.post(
+    "/process/batch/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Process a streamed batch of invoices",
+    description=(
+        "Process invoices sent as newline-delimited JSON "
+        "(application/x-ndjson), one invoice per line. Lines are read and "
+        "validated as they arrive, and results are streamed back as NDJSON "
+        "in completion order."
+    )
+)
+async def process_batch_stream(
+    request: Request,
+    processor: InvoiceProcessor = Depends(get_processor)
+) -> StreamingResponse:
+    """
+    Process a streamed NDJSON batch of invoices
+    
+    Args:
+        request: Raw request whose body is one invoice JSON per line
+        processor: Shared invoice processor
         
-    except Exception as e:
-        logger.exception("Error in batch processing: %s", e)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Batch processing error: {str(e)}"
-        )
+    Returns:
+        NDJSON stream of per-invoice results
+    """
+    logger.info("Received streamed batch processing request")
+    
+    results = processor.iter_stream_invoices(
+        _ndjson_lines(request, settings.STREAM_MAX_LINE_BYTES)
+    )
+    return _DuplexStreamingResponse(_ndjson_results(results), media_type="application/x-ndjson")
 
 
 @router.get(
@@ -14,6 +14,31 @@ class Settings(BaseSettings):
     DB_NAME: str = "invoice_db"
     DB_USER: str = "postgres"
     DB_PASSWORD: str = ""
+    DB_POOL_MIN_SIZE: int = 4
+    DB_POOL_MAX_SIZE: int = 32
+    # Schema holding the invoice tables; first on every connection's
+    # search_path, so queries name tables without a schema prefix
+    DB_SCHEMA: str = "tenant_data"
+    # Bulk inserts of at least this many rows use COPY instead of INSERT
+    DB_COPY_THRESHOLD: int = 200
+    # False skips the WAL flush wait on commit: a crash may lose the last
+    # moments of committed invoices, but never corrupts or half-applies one
+    DB_SYNCHRONOUS_COMMIT: bool = True
+    
+    # Invoices writing to the database at once, across all requests
+    # (keep <= DB_POOL_MAX_SIZE)
+    BATCH_MAX_CONCURRENCY: int = 32
+    # Longest invoice line accepted by the streamed batch endpoint (bytes)
+    STREAM_MAX_LINE_BYTES: int = 4194304
+    
+    # Background line inserts: trades durability of queued lines for
+    # throughput; headers and PO lines are still committed before the
+    # response
+    INSERT_BUFFER_ENABLED: bool = False
+    INSERT_BUFFER_MAX_ROWS: int = 10000
+    INSERT_BUFFER_FLUSH_SECONDS: float = 2.0
+    # Rows that still fail on retry are appended here as NDJSON
+    INSERT_BUFFER_DEAD_LETTER_PATH: str = "failed_inserts.ndjson"
     
     # Authentication settings
     LOGIN_URL: str = "https://auth.example.com/login"
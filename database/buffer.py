@@ -0,0 +1,167 @@
+"""
+Background insertion buffer for bulk line rows
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from logs.log import logger
+
+
+class BufferedInserter:
+    """
+    Collect rows per table and bulk-insert them from a background task
+
+    Rows are flushed once max_rows are pending or every flush_interval
+    seconds, whichever comes first, with one run_many call (COPY for large
+    sets) per table. Callers return as soon as their rows are queued.
+
+    If a table's combined insert fails, each queued batch (one per
+    put_nowait call, i.e. per invoice) is retried on its own, so one bad
+    row only fails its own invoice's batch. Batches that still fail are
+    appended to dead_letter_path as NDJSON for replay.
+
+    Trade-off: queued rows are not durable. If the process dies before
+    flushing, those rows are lost.
+    """
+
+    def __init__(
+        self,
+        run_many_func,
+        max_rows: int = 10000,
+        flush_interval: float = 2.0,
+        dead_letter_path: Optional[str] = None
+    ):
+        """
+        Initialize the buffer
+
+        Args:
+            run_many_func: Async function inserting many rows into a table
+            max_rows: Pending row count that triggers an early flush
+            flush_interval: Seconds between periodic flushes
+            dead_letter_path: File that batches failing on their own are
+                appended to, one JSON object per line; None only logs them
+        """
+        self.run_many = run_many_func
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.dead_letter_path = dead_letter_path
+        # Batches are kept apart so a failed flush can be retried per batch
+        self._pending: Dict[Tuple[str, Tuple[str, ...]], List[Sequence[Sequence[Any]]]] = {}
+        self._pending_count = 0
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    def put_nowait(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Sequence[Sequence[Any]]
+    ) -> None:
+        """
+        Queue rows for a later bulk insert
+
+        Args:
+            table: Target table, optionally schema-qualified
+            columns: Column names, in the order of each row's values
+            rows: Value tuples, one per row
+        """
+        if not rows:
+            return
+
+        self._pending.setdefault((table, tuple(columns)), []).append(rows)
+        self._pending_count += len(rows)
+        if self._pending_count >= self.max_rows:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background flush task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background task and flush whatever is still queued"""
+        if self._task is not None:
+            task, self._task = self._task, None
+            # Let the loop finish its current flush rather than cancelling
+            # it mid-insert
+            self._closing = True
+            self._wakeup.set()
+            await task
+
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Insert every queued row now"""
+        pending, self._pending = self._pending, {}
+        self._pending_count = 0
+
+        for (table, columns), batches in pending.items():
+            rows = [row for batch in batches for row in batch]
+            try:
+                await self.run_many(table, columns, rows)
+                continue
+            except Exception as e:
+                if len(batches) == 1:
+                    await self._dead_letter(table, columns, rows, e)
+                    continue
+                logger.warning(
+                    "Buffered insert into %s failed (%s), retrying %d batches one by one",
+                    table, e, len(batches)
+                )
+
+            for batch in batches:
+                try:
+                    await self.run_many(table, columns, batch)
+                except Exception as e:
+                    await self._dead_letter(table, columns, batch, e)
+
+    async def _dead_letter(
+        self,
+        table: str,
+        columns: Tuple[str, ...],
+        rows: Sequence[Sequence[Any]],
+        error: Exception
+    ) -> None:
+        """Append rows that could not be inserted to the dead-letter file"""
+        if self.dead_letter_path is None:
+            logger.error("Buffered insert into %s failed, %d rows lost: %s", table, len(rows), error)
+            return
+
+        record = orjson.dumps(
+            {"table": table, "columns": columns, "rows": rows, "error": str(error)},
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE
+        )
+        try:
+            await asyncio.to_thread(self._append_dead_letter, record)
+        except Exception as e:
+            logger.error(
+                "Buffered insert into %s failed (%s) and %d rows could not be dead-lettered: %s",
+                table, error, len(rows), e
+            )
+            return
+
+        logger.error(
+            "Buffered insert into %s failed, %d rows written to %s: %s",
+            table, len(rows), self.dead_letter_path, error
+        )
+
+    def _append_dead_letter(self, record: bytes) -> None:
+        """Append one encoded record to the dead-letter file"""
+        with open(self.dead_letter_path, "ab") as f:
+            f.write(record)
+
+    async def _flush_loop(self) -> None:
+        """Flush on the timer, or early when max_rows are pending"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if self._pending:
+                await self.flush()
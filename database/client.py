@@ -1,17 +1,62 @@
 """
 Database client for PostgreSQL operations
 """
-from typing import List, Dict, Any, Tuple
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional, Sequence, Mapping, Union, AsyncIterator
 from fastapi import HTTPException
-from fastapi.concurrency import run_in_threadpool
-import psycopg
-from psycopg import OperationalError
+import httpx
+from psycopg import AsyncConnection, OperationalError, sql
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 import traceback
 
 from logs.log import logger
 from config import settings
 
 
+# Process-wide connection pool, opened on startup (or lazily on first query)
+_pool: Optional[AsyncConnectionPool] = None
+
+# Connection bound by transaction(); queries in the same task reuse it
+_tx_conn: ContextVar[Optional[AsyncConnection]] = ContextVar("_tx_conn", default=None)
+
+# Set inside pipeline(); COPY cannot run in pipeline mode
+_pipelined: ContextVar[bool] = ContextVar("_pipelined", default=False)
+
+# Keep-alive HTTP client for the auth service, opened on startup (or lazily)
+_auth_client: Optional[httpx.AsyncClient] = None
+
+
+async def open_auth_client() -> httpx.AsyncClient:
+    """
+    Open the process-wide HTTP client for the auth service
+    
+    Safe to call more than once; keep-alive connections are reused
+    across logins instead of a fresh TCP + TLS handshake per call.
+    
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _auth_client
+    
+    if _auth_client is None:
+        _auth_client = httpx.AsyncClient(http2=True, verify=True, timeout=5.0)
+    
+    return _auth_client
+
+
+async def close_auth_client() -> None:
+    """Close the process-wide auth HTTP client, if open"""
+    global _auth_client
+    
+    if _auth_client is not None:
+        client, _auth_client = _auth_client, None
+        await client.aclose()
+
+
 async def get_access_token(email: str, password: str) -> Tuple[str, str]:
     """
     Get authentication tokens
@@ -23,21 +68,14 @@ async def get_access_token(email: str, password: str) -> Tuple[str, str]:
     Returns:
         Tuple of (access_token, refresh_token)
     """
-    import requests
-    
-    def login(payload):
-        response = requests.post(
-            url=settings.LOGIN_URL,
-            json=payload,
-            verify=False
-        )
-        return response.json()
+    client = await open_auth_client()
     
     try:
-        auth_res = await run_in_threadpool(
-            login,
-            {"username": email, "password": password}
+        response = await client.post(
+            settings.LOGIN_URL,
+            json={"username": email, "password": password}
         )
+        auth_res = response.json()
     except Exception as exc:
         logger.exception("Sign-in failed for email=%s", email)
         raise HTTPException(status_code=500, detail="Authentication service error")
@@ -59,16 +97,148 @@ async def get_access_token(email: str, password: str) -> Tuple[str, str]:
     return access_token, refresh_token
 
 
+def _connection_options() -> str:
+    """Server settings sent in each new connection's startup packet"""
+    options = [f"-c search_path={settings.DB_SCHEMA},public"]
+    if not settings.DB_SYNCHRONOUS_COMMIT:
+        options.append("-c synchronous_commit=off")
+    return " ".join(options)
+
+
+async def open_pool() -> AsyncConnectionPool:
+    """
+    Open the process-wide PostgreSQL connection pool
+
+    Safe to call more than once; the pool is created on first use and
+    reused for every subsequent query.
+
+    Returns:
+        The shared AsyncConnectionPool
+    """
+    global _pool
+
+    if _pool is None:
+        pool = AsyncConnectionPool(
+            conninfo=make_conninfo(
+                host=settings.DB_HOST,
+                port=settings.DB_PORT,
+                dbname=settings.DB_NAME,
+                user=settings.DB_USER,
+                password=settings.DB_PASSWORD,
+                sslmode="require",
+                connect_timeout=5,
+                options=_connection_options()
+            ),
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            # Rows come back as dicts straight from the C row loader; the
+            # per-invoice INSERTs are prepared server-side on first repeat
+            kwargs={"row_factory": dict_row, "prepare_threshold": 1},
+            open=False
+        )
+        _pool = pool
+        await pool.open()
+        logger.info(
+            "Connection pool opened: min_size=%d, max_size=%d",
+            settings.DB_POOL_MIN_SIZE,
+            settings.DB_POOL_MAX_SIZE
+        )
+
+    return _pool
+
+
+async def close_pool() -> None:
+    """Close the process-wide connection pool, if open"""
+    global _pool
+
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+        logger.info("Connection pool closed")
+
+
+@asynccontextmanager
+async def _connection() -> AsyncIterator[AsyncConnection]:
+    """Yield the connection of the open transaction, or borrow one from the pool"""
+    conn = _tx_conn.get()
+    if conn is not None:
+        yield conn
+        return
+    
+    pool = await open_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def transaction() -> AsyncIterator[AsyncConnection]:
+    """
+    Run every run_query/run_many issued inside the block in one transaction
+    
+    The transaction commits once when the block exits cleanly and rolls
+    back if it raises. Nested blocks become savepoints on the same
+    connection, so an inner failure can be rolled back on its own.
+    
+    Yields:
+        The connection bound to the transaction
+    """
+    conn = _tx_conn.get()
+    if conn is not None:
+        async with conn.transaction():
+            yield conn
+        return
+    
+    pool = await open_pool()
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            token = _tx_conn.set(conn)
+            try:
+                yield conn
+            finally:
+                _tx_conn.reset(token)
+
+
+def in_transaction() -> bool:
+    """Whether a transaction() block is open in the current context"""
+    return _tx_conn.get() is not None
+
+
+@asynccontextmanager
+async def pipeline() -> AsyncIterator[None]:
+    """
+    Send the statements issued inside the block without awaiting each one
+    
+    Uses psycopg pipeline mode on the connection bound by transaction(),
+    so N independent writes cost one round trip instead of N. Statements
+    are still executed in order, and any error is raised when the block
+    exits. Only use it for statements whose result rows are not needed;
+    outside a transaction it does nothing.
+    """
+    conn = _tx_conn.get()
+    if conn is None:
+        yield
+        return
+    
+    async with conn.pipeline():
+        token = _pipelined.set(True)
+        try:
+            yield
+        finally:
+            _pipelined.reset(token)
+
+
 async def run_query(
     query: str,
+    params: Optional[Union[Sequence[Any], Mapping[str, Any]]] = None,
     *,
     retry_on_expire: bool = True
 ) -> List[Dict[str, Any]]:
     """
-    Execute PostgreSQL query
+    Execute PostgreSQL query on a pooled connection
     
     Args:
-        query: SQL query to execute
+        query: SQL query to execute, with %s / %(name)s placeholders
+        params: Values bound to the placeholders, never interpolated
         retry_on_expire: Whether to retry on token expiration (not implemented)
         
     Returns:
@@ -77,63 +247,101 @@ async def run_query(
     Raises:
         HTTPException: If query execution fails
     """
+    try:
+        # Pooled connections commit on a clean exit and roll back on error
+        async with _connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                
+                # INSERT/UPDATE/DELETE without RETURNING have no rows
+                result = await cur.fetchall() if cur.description else []
+        
+        logger.debug("run_query success, rows=%d", len(result))
+        return result
     
-    def _connect_and_exec() -> List[Dict[str, Any]]:
-        """Internal function to execute query"""
-        conn = None
-        cur = None
-        try:
-            conn = psycopg.connect(
-                host=settings.DB_HOST,
-                port=settings.DB_PORT,
-                dbname=settings.DB_NAME,
-                user=settings.DB_USER,
-                password=settings.DB_PASSWORD,
-                sslmode="require",
-                connect_timeout=5
-            )
-            
-            cur = conn.cursor()
-            
-            # Execute query
-            cur.execute(query)
-            
-            # Commit for INSERT/UPDATE/DELETE
-            if cur.description is None:
-                conn.commit()
-                return []
-            
-            # SELECT or INSERT ... RETURNING rows
-            rows = cur.fetchall()
-            conn.commit()
-            
-            # Convert rows -> list[dict] using description
-            desc = [col.name for col in cur.description] if cur.description else []
-            result: List[Dict[str, Any]] = []
-            for row in rows:
-                row_dict = {desc[i]: row[i] for i in range(len(desc))}
-                result.append(row_dict)
-            
-            return result
-            
-        except OperationalError as oe:
-            logger.error("OperationalError during DB operation: %s", oe)
-            raise
-        except Exception as exc:
-            logger.exception("Error executing query: %s\n%s", exc, traceback.format_exc())
-            raise HTTPException(status_code=500, detail="Error executing query")
+    except OperationalError as oe:
+        logger.error("OperationalError during DB operation: %s", oe)
+        raise HTTPException(status_code=500, detail="Unexpected error executing query")
+    except Exception as exc:
+        logger.exception("Error executing query: %s\n%s", exc, traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Error executing query")
+
+
+@lru_cache(maxsize=128)
+def _insert_values_sql(table: str, columns: Tuple[str, ...], n_rows: int) -> sql.Composed:
+    """INSERT INTO table (columns) VALUES with n_rows placeholder tuples"""
+    row_sql = sql.SQL("({})").format(
+        sql.SQL(", ").join(sql.Placeholder() * len(columns))
+    )
+    return sql.SQL("INSERT INTO {} ({}) VALUES {}").format(
+        sql.Identifier(*table.split(".")),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.SQL(", ").join([row_sql] * n_rows)
+    )
+
+
+@lru_cache(maxsize=32)
+def _copy_sql(table: str, columns: Tuple[str, ...]) -> sql.Composed:
+    """COPY table (columns) FROM STDIN"""
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(*table.split(".")),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+
+
+async def run_many(
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    *,
+    batch_size: int = 500
+) -> int:
+    """
+    Insert many rows as multi-row INSERT ... VALUES statements, or COPY
+    
+    Each statement carries up to batch_size rows, so N rows cost
+    ceil(N / batch_size) round trips instead of N. From
+    settings.DB_COPY_THRESHOLD rows on, the rows are streamed with
+    COPY ... FROM STDIN instead, which skips statement parsing entirely.
+    
+    Args:
+        table: Target table, optionally schema-qualified ("schema.table")
+        columns: Column names, in the order of each row's values
+        rows: Value tuples, one per row
+        batch_size: Maximum rows per INSERT statement
         
-        finally:
-            if cur is not None:
-                cur.close()
-            if conn is not None:
-                conn.close()
+    Returns:
+        Number of rows inserted
+        
+    Raises:
+        HTTPException: If execution fails
+    """
+    if not rows:
+        return 0
+    
+    columns = tuple(columns)
     
     try:
-        result = await run_in_threadpool(_connect_and_exec)
-        logger.info("run_query success, rows=%d", len(result))
-        return result
+        async with _connection() as conn:
+            async with conn.cursor() as cur:
+                if len(rows) >= settings.DB_COPY_THRESHOLD and not _pipelined.get():
+                    async with cur.copy(_copy_sql(table, columns)) as copy:
+                        for row in rows:
+                            await copy.write_row(row)
+                else:
+                    for start in range(0, len(rows), batch_size):
+                        chunk = rows[start:start + batch_size]
+                        await cur.execute(
+                            _insert_values_sql(table, columns, len(chunk)),
+                            [value for row in chunk for value in row]
+                        )
+        
+        logger.debug("run_many success, rows=%d", len(rows))
+        return len(rows)
     
-    except Exception as exc:
-        logger.exception("Unexpected error in run_query: %s\n%s", exc, traceback.format_exc())
+    except OperationalError as oe:
+        logger.error("OperationalError during DB operation: %s", oe)
         raise HTTPException(status_code=500, detail="Unexpected error executing query")
+    except Exception as exc:
+        logger.exception("Error executing batch insert: %s\n%s", exc, traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Error executing query")
@@ -4,7 +4,7 @@ Example usage of the invoice automation system
 import asyncio
 import json
 from services.processor import InvoiceProcessor
-from database.client import run_query
+from database.client import run_query, run_many, transaction, pipeline, close_pool
 
 
 # Example OCR data (same as provided in requirements)
@@ -68,7 +68,7 @@ async def process_single_invoice_example():
     print("=" * 80)
     
     # Create processor
-    processor = InvoiceProcessor(run_query)
+    processor = InvoiceProcessor(run_query, run_many, transaction, pipeline)
     
     # Process invoice
     result = await processor.process_invoice(EXAMPLE_OCR_DATA)
@@ -89,7 +89,7 @@ async def process_batch_invoices_example():
     invoices = [EXAMPLE_OCR_DATA] * 3  # Process same invoice 3 times for demo
     
     # Create processor
-    processor = InvoiceProcessor(run_query)
+    processor = InvoiceProcessor(run_query, run_many, transaction, pipeline)
     
     # Process batch
     result = await processor.process_batch_invoices(invoices)
@@ -136,7 +136,7 @@ async def standalone_usage_example():
     print("  (Skipped in example - set up database connection first)")
     
     # Uncomment below to actually insert
-    # db_service = DatabaseService(run_query)
+    # db_service = DatabaseService(run_query, run_many, transaction, pipeline)
     # result = await db_service.insert_complete_invoice(
     #     po_header, po_lines, po_conditions, grn_header, grn_lines
     # )
@@ -167,6 +167,9 @@ async def main():
         print(f"\nError running examples: {e}")
         import traceback
         traceback.print_exc()
+    
+    finally:
+        await close_pool()
 
 
 if __name__ == "__main__":
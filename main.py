@@ -1,12 +1,21 @@
 """
 Main FastAPI application for invoice automation
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 from api.endpoints import router as invoice_router
 from config import settings
+from database.client import (
+    open_pool, close_pool, open_auth_client, close_auth_client,
+    run_query, run_many, transaction, pipeline
+)
+from database.buffer import BufferedInserter
+from services.processor import InvoiceProcessor
 from logs.log import logger
 
 
@@ -16,7 +25,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Automated invoice processing from OCR data to database",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -36,12 +46,50 @@ app.include_router(invoice_router)
 async def startup_event():
     """Application startup event"""
     logger.info("Starting %s v%s", settings.APP_NAME, settings.APP_VERSION)
+    
+    # uvicorn[standard] runs on uvloop where available; make a silent
+    # fallback to the slower default loop visible
+    loop = asyncio.get_running_loop()
+    if not type(loop).__module__.startswith("uvloop"):
+        logger.warning("Running on %s, not uvloop", type(loop).__name__)
+    
+    app.state.pool = await open_pool()
+    app.state.auth_client = await open_auth_client()
+    
+    app.state.line_buffer = None
+    if settings.INSERT_BUFFER_ENABLED:
+        app.state.line_buffer = BufferedInserter(
+            run_many,
+            max_rows=settings.INSERT_BUFFER_MAX_ROWS,
+            flush_interval=settings.INSERT_BUFFER_FLUSH_SECONDS,
+            dead_letter_path=settings.INSERT_BUFFER_DEAD_LETTER_PATH
+        )
+        app.state.line_buffer.start()
+    
+    app.state.processor = InvoiceProcessor(
+        run_query,
+        run_many,
+        transaction,
+        pipeline,
+        max_concurrency=settings.BATCH_MAX_CONCURRENCY,
+        line_buffer=app.state.line_buffer
+    )
+    
+    try:
+        await app.state.processor.warmup()
+    except Exception as e:
+        # Not fatal: lookups fall back to querying on first use
+        logger.warning("Reference data warmup failed: %s", e)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("Shutting down %s", settings.APP_NAME)
+    if app.state.line_buffer is not None:
+        await app.state.line_buffer.close()
+    await close_auth_client()
+    await close_pool()
 
 
 @app.get("/", tags=["Root"])
@@ -61,5 +109,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        loop="auto",  # uvloop when installed
         log_level=settings.LOG_LEVEL.lower()
     )
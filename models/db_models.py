@@ -1,18 +1,22 @@
 """
 Database models for GRN and PO tables
+
+These are internal row carriers built by OCRMapper from already-validated
+input, so they are plain slotted dataclasses rather than pydantic models.
 """
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
 from typing import Optional
 from datetime import date, datetime
 from uuid import UUID, uuid4
 
 
-class GRNHeader(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class GRNHeader:
     """Model for s_grn_header table"""
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = field(default_factory=uuid4)
     is_deleted: bool = False
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime
+    updated_at: datetime
     created_by: Optional[UUID] = None
     updated_by: Optional[UUID] = None
     s_effective_from: date
@@ -35,12 +39,13 @@ class GRNHeader(BaseModel):
     s_weight_uom_id: str
 
 
-class GRNLine(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class GRNLine:
     """Model for s_grn_line table"""
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = field(default_factory=uuid4)
     is_deleted: bool = False
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime
+    updated_at: datetime
     created_by: Optional[UUID] = None
     updated_by: Optional[UUID] = None
     s_grn_line_id: str
@@ -71,12 +76,13 @@ class GRNLine(BaseModel):
     s_external_system: Optional[str] = None
 
 
-class POHeader(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class POHeader:
     """Model for s_po_header table"""
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = field(default_factory=uuid4)
     is_deleted: bool = False
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime
+    updated_at: datetime
     created_by: Optional[UUID] = None
     updated_by: Optional[UUID] = None
     s_approved_by: Optional[str] = None
@@ -110,12 +116,13 @@ class POHeader(BaseModel):
     s_tax_rate_ref: UUID
 
 
-class POLine(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class POLine:
     """Model for s_po_line table"""
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = field(default_factory=uuid4)
     is_deleted: bool = False
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime
+    updated_at: datetime
     created_by: Optional[UUID] = None
     updated_by: Optional[UUID] = None
     s_batch_required_flag: bool = False
@@ -148,12 +155,13 @@ class POLine(BaseModel):
     s_uom_id: str
 
 
-class POCondition(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class POCondition:
     """Model for s_po_condition table"""
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = field(default_factory=uuid4)
     is_deleted: bool = False
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime
+    updated_at: datetime
     created_by: Optional[UUID] = None
     updated_by: Optional[UUID] = None
     s_calculation_basis: str
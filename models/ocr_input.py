@@ -1,12 +1,15 @@
 """
 Pydantic models for OCR input validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Dict, Optional, Any
 
 
 class InvoiceLine(BaseModel):
     """Model for individual invoice line items"""
+    # OCR payloads always use the human-readable aliases
+    model_config = ConfigDict(extra="ignore", populate_by_name=False)
+    
     description: Optional[str] = Field(None, alias="Invoice Lines/Description")
     quantity: Optional[str] = Field(None, alias="Quantity")
     line_amount: Optional[str] = Field(None, alias="Line Amount")
@@ -20,46 +23,64 @@ class InvoiceLine(BaseModel):
     line_no: Optional[str] = None
     unit: Optional[str] = None
 
-    class Config:
-        populate_by_name = True
-
 
 class StaticData(BaseModel):
     """Model for static invoice data"""
-    invoice_date: Optional[List[str]] = Field(None, alias="Invoice Date")
-    invoice_currency: Optional[List[str]] = Field(None, alias="Invoice Currency")
-    supplier_city: Optional[List[str]] = None
-    supplier_state: Optional[List[str]] = None
-    total_invoice_amount: Optional[List[str]] = Field(None, alias="Total Invoice Amount")
-    invoice_tax_amount: Optional[List[str]] = Field(None, alias="Invoice Tax Amount")
-    subtotal: Optional[List[str]] = None
-    delivery_location: Optional[List[str]] = None
-    invoice_information: Optional[List[str]] = Field(None, alias="Invoice information")
-    account_number: Optional[List[str]] = None
-    bill_to_address: Optional[List[str]] = None
-    ship_to_address: Optional[List[str]] = None
-    shipping_amount: Optional[List[str]] = None
-    hsn_code: Optional[List[str]] = None
-    supplier_gstn: Optional[List[str]] = Field(None, alias="Supplier GSTN")
-    location_gstn: Optional[List[str]] = Field(None, alias="Location GSTN")
-    supplier_name: Optional[List[str]] = Field(None, alias="Supplier Name")
-    irn: Optional[List[str]] = None
-    invoice_no: Optional[List[str]] = Field(None, alias="Invoice No")
-    cgst: Optional[List[str]] = Field(None, alias="CGST")
-    sgst: Optional[List[str]] = Field(None, alias="SGST")
-    igst: Optional[List[str]] = Field(None, alias="IGST")
-    po_number: Optional[List[str]] = Field(None, alias="PO Number")
-    supplier_address: Optional[List[str]] = None
-    consumer_number: Optional[List[str]] = None
-    customer_address: Optional[List[str]] = None
-    file_name: Optional[List[str]] = None
-    gst_number: Optional[List[str]] = None
-    due_date: Optional[List[str]] = None
-    applicable_tax: Optional[List[str]] = Field(None, alias="Applicable Tax")
-    currency: Optional[List[str]] = None
-
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(extra="ignore", populate_by_name=False)
+    
+    invoice_date: List[str] = Field(default_factory=list, alias="Invoice Date")
+    invoice_currency: List[str] = Field(default_factory=list, alias="Invoice Currency")
+    supplier_city: List[str] = Field(default_factory=list)
+    supplier_state: List[str] = Field(default_factory=list)
+    total_invoice_amount: List[str] = Field(default_factory=list, alias="Total Invoice Amount")
+    invoice_tax_amount: List[str] = Field(default_factory=list, alias="Invoice Tax Amount")
+    subtotal: List[str] = Field(default_factory=list)
+    delivery_location: List[str] = Field(default_factory=list)
+    invoice_information: List[str] = Field(default_factory=list, alias="Invoice information")
+    account_number: List[str] = Field(default_factory=list)
+    bill_to_address: List[str] = Field(default_factory=list)
+    ship_to_address: List[str] = Field(default_factory=list)
+    shipping_amount: List[str] = Field(default_factory=list)
+    hsn_code: List[str] = Field(default_factory=list)
+    supplier_gstn: List[str] = Field(default_factory=list, alias="Supplier GSTN")
+    location_gstn: List[str] = Field(default_factory=list, alias="Location GSTN")
+    supplier_name: List[str] = Field(default_factory=list, alias="Supplier Name")
+    irn: List[str] = Field(default_factory=list)
+    invoice_no: List[str] = Field(default_factory=list, alias="Invoice No")
+    cgst: List[str] = Field(default_factory=list, alias="CGST")
+    sgst: List[str] = Field(default_factory=list, alias="SGST")
+    igst: List[str] = Field(default_factory=list, alias="IGST")
+    po_number: List[str] = Field(default_factory=list, alias="PO Number")
+    supplier_address: List[str] = Field(default_factory=list)
+    consumer_number: List[str] = Field(default_factory=list)
+    customer_address: List[str] = Field(default_factory=list)
+    file_name: List[str] = Field(default_factory=list)
+    gst_number: List[str] = Field(default_factory=list)
+    due_date: List[str] = Field(default_factory=list)
+    applicable_tax: List[str] = Field(default_factory=list, alias="Applicable Tax")
+    currency: List[str] = Field(default_factory=list)
+    
+    @field_validator("*", mode="before")
+    @classmethod
+    def _null_as_empty(cls, value: Any) -> Any:
+        """OCR sends null for fields it found nothing for; treat it as []"""
+        return [] if value is None else value
+    
+    def first_values(self) -> Dict[str, str]:
+        """
+        Stripped first value of every field whose first value is non-blank
+        
+        OCR leaves most fields as [] or [""]; extracting once per invoice
+        lets the mapper read fields with a dict lookup, and absent fields
+        come back as None from .get().
+        """
+        firsts = {}
+        for name, values in self.__dict__.items():
+            if values and values[0]:
+                value = values[0].strip()
+                if value:
+                    firsts[name] = value
+        return firsts
 
 
 class OCRInput(BaseModel):
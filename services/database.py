@@ -2,10 +2,13 @@
 Database service for inserting GRN and PO data
 FIXED: Corrected parameter names for master data service calls
 """
-from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+from operator import attrgetter
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 from uuid import UUID
 from datetime import datetime, date
 
+from database.client import in_transaction
 from models.db_models import (
     GRNHeader, GRNLine, POHeader, POLine, POCondition
 )
@@ -13,18 +16,142 @@ from services.master_data import MasterDataService
 from logs.log import logger
 
 
+def _insert_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """Build a single-row parameterized INSERT for a tenant table"""
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+
+# Column names double as model attribute names, so each table's row tuple
+# is read straight off the model with one attrgetter call
+_PO_HEADER_COLUMNS = (
+    'id', 'is_deleted', 'created_at', 'updated_at', 'created_by', 'updated_by',
+    's_approved_by', 's_cost_center_ref', 's_created_by', 's_currency_id',
+    's_effective_from', 's_effective_to', 's_external_system', 's_external_system_id',
+    's_freight_included_flag', 's_incoterms', 's_legal_entity_ref', 's_legal_entity_site_ref',
+    's_matching_type', 's_payment_terms', 's_plant_ref', 's_po_date',
+    's_po_id', 's_po_number', 's_po_status', 's_po_total_value',
+    's_po_type', 's_po_valid_from', 's_po_valid_to', 's_profit_center_ref',
+    's_project_id', 's_project_ref', 's_supplier_ref', 's_supplier_site_ref',
+    's_tax_rate_ref',
+)
+_PO_HEADER_SQL = _insert_sql("s_po_header", _PO_HEADER_COLUMNS)
+_po_header_row = attrgetter(*_PO_HEADER_COLUMNS)
+
+
+_GRN_HEADER_COLUMNS = (
+    'id', 'is_deleted', 'created_at', 'updated_at', 'created_by', 'updated_by',
+    's_effective_from', 's_effective_to', 's_external_system', 's_external_system_id',
+    's_gl_account_ref', 's_grn_date', 's_grn_id', 's_grn_number',
+    's_grn_status', 's_legal_entity_site_ref', 's_po_line_ref', 's_qc_status',
+    's_supplier_site_ref', 's_total_received_amount', 's_total_received_qty',
+    's_total_received_weight', 's_transport_mode', 's_weight_uom_id',
+)
+_GRN_HEADER_SQL = _insert_sql("s_grn_header", _GRN_HEADER_COLUMNS)
+_grn_header_row = attrgetter(*_GRN_HEADER_COLUMNS)
+
+
+_PO_LINE_TABLE = "s_po_line"
+_PO_LINE_COLUMNS = (
+    'id', 'is_deleted', 'created_at', 'updated_at', 'created_by', 'updated_by',
+    's_batch_required_flag', 's_cas_number', 's_chemical_grade', 's_closed_quantity',
+    's_coa_required_flag', 's_drawing_number', 's_drawing_revision', 's_effective_from',
+    's_effective_to', 's_expected_delivery_date', 's_expiry_required_flag',
+    's_external_system', 's_external_system_id', 's_hsn_id', 's_item_ref',
+    's_line_amount', 's_line_number', 's_line_status', 's_ordered_quantity',
+    's_po_header_ref', 's_po_line_id', 's_price_valid_from', 's_price_valid_to',
+    's_qc_required_flag', 's_tolerance_pct', 's_total_invoiced_qty',
+    's_unit_price', 's_uom_id',
+)
+_po_line_row = attrgetter(*_PO_LINE_COLUMNS)
+
+
+_PO_CONDITION_TABLE = "s_po_condition"
+_PO_CONDITION_COLUMNS = (
+    'id', 'is_deleted', 'created_at', 'updated_at', 'created_by', 'updated_by',
+    's_calculation_basis', 's_condition_type', 's_effective_from', 's_effective_to',
+    's_external_system', 's_external_system_id', 's_po_condition_id',
+    's_po_header_ref', 's_rate', 's_uom_id',
+)
+_po_condition_row = attrgetter(*_PO_CONDITION_COLUMNS)
+
+
+_GRN_LINE_TABLE = "s_grn_line"
+_GRN_LINE_COLUMNS = (
+    'id', 'is_deleted', 'created_at', 'updated_at', 'created_by', 'updated_by',
+    's_grn_line_id', 's_item_description', 's_drawing_number', 's_drawing_revision',
+    's_uom_id', 's_received_qty', 's_unit_price', 's_total_received_amount',
+    's_accepted_qty', 's_rejected_qty', 's_rejection_reason', 's_received_weight',
+    's_weight_uom', 's_qc_required_flag', 's_qc_result', 's_grn_line_status',
+    's_batch_number', 's_manufacture_date', 's_expiry_date', 's_compliance_verified_flag',
+    's_grn_ref', 's_item_ref', 's_effective_from', 's_effective_to',
+    's_external_system_id', 's_external_system',
+)
+_grn_line_row = attrgetter(*_GRN_LINE_COLUMNS)
+
+
+def _tax_rate_name(po_conditions: List[POCondition]) -> str:
+    """
+    Composite s_tax_rate name of a PO, e.g. IGST_18 or CGST_SGST_18
+    
+    Each tax type counts once, at its first rate (static values come
+    first); the name joins the types in condition order with their
+    combined rate. A PO without tax conditions is NIL_0.
+    """
+    rates: Dict[str, float] = {}
+    for condition in po_conditions:
+        rates.setdefault(condition.s_condition_type, condition.s_rate)
+    if not rates:
+        return "NIL_0"
+    return f"{'_'.join(rates)}_{sum(rates.values()):g}"
+
+
+@asynccontextmanager
+async def _noop_scope() -> AsyncIterator[None]:
+    """Stand-in scope when no transaction or pipeline function is supplied"""
+    yield
+
+
 class DatabaseService:
     """Service for database operations"""
     
-    def __init__(self, run_query_func):
+    def __init__(
+        self,
+        run_query_func,
+        run_many_func,
+        transaction_func=None,
+        pipeline_func=None,
+        line_buffer=None
+    ):
         """
-        Initialize with the run_query function
+        Initialize with the run_query and run_many functions
         
         Args:
             run_query_func: Async function to execute database queries
+            run_many_func: Async function inserting many rows into a
+                table as multi-row INSERT statements
+            transaction_func: Async context manager factory; queries issued
+                inside it share one transaction. Without it every
+                statement commits on its own.
+            pipeline_func: Async context manager factory; write-only
+                statements issued inside it are sent without waiting for
+                each result (see database.client.pipeline)
+            line_buffer: Optional BufferedInserter. When given, PO
+                conditions and GRN lines are queued for a background bulk
+                insert once the invoice has committed, instead of being
+                written in the invoice transaction. PO lines are always
+                written in the transaction: the GRN header references the
+                first one. Inside an enclosing transaction (single_transaction
+                batches) nothing is queued, since a flush could run before
+                that outer transaction commits or after it rolls back.
         """
         self.run_query = run_query_func
-        self.schema = "tenant_data"
+        self.run_many = run_many_func
+        self.transaction = transaction_func or _noop_scope
+        self.pipeline = pipeline_func or _noop_scope
+        self.line_buffer = line_buffer
         self.master_data_service = MasterDataService(run_query_func)
     
     async def insert_complete_invoice(
@@ -41,6 +168,7 @@ class DatabaseService:
         """
         Insert complete invoice data (PO and GRN) into database
         First ensures all master data exists, then inserts transactional data
+        All statements run in one transaction, committed once at the end
         Returns summary of inserted records
         """
         results = {
@@ -49,131 +177,143 @@ class DatabaseService:
             "po_conditions_count": 0,
             "grn_header_id": str(grn_header.id),
             "grn_lines_count": 0,
+            "po_conditions_queued": 0,
+            "grn_lines_queued": 0,
             "success": False,
             "errors": []
         }
         
+        # Queued rows are flushed on their own connection, so they may only
+        # be queued once this invoice is committed, not under an outer
+        # transaction that could still roll back
+        line_buffer = None if in_transaction() else self.line_buffer
+        
         try:
-            # Step 1: Ensure all master data exists
-            logger.info("=== MASTER DATA INSERTION PHASE ===")
-            logger.info("Ensuring master data exists...")
+            # Read-only and cached after the first invoice, so resolve it
+            # outside the transaction, where its two lookups can run on
+            # separate pooled connections instead of queueing on one
+            country_id, state_id = await self.master_data_service.default_site_location()
             
-            # Ensure supplier and supplier site
-            logger.info(f"Ensuring supplier exists: name='{supplier_info.get('supplier_name')}', ref={supplier_info['supplier_ref']}")
-            await self.master_data_service.ensure_supplier(
-                supplier_ref=supplier_info['supplier_ref'],
-                supplier_name=supplier_info['supplier_name'],
-                supplier_gstn=supplier_info.get('supplier_gstn')
-            )
-            logger.info(f"✓ Supplier ensured successfully")
-            
-            logger.info(f"Ensuring supplier site exists: ref={supplier_info['supplier_site_ref']}, gstin={supplier_info.get('supplier_gstn')}")
-            await self.master_data_service.ensure_supplier_site(
-                site_ref=supplier_info['supplier_site_ref'],
-                supplier_ref=supplier_info['supplier_ref'],
-                address=supplier_info.get('supplier_address'),
-                gstin=supplier_info.get('supplier_gstn')  # FIXED: was 'gstn', now 'gstin'
-            )
-            logger.info(f"✓ Supplier site ensured successfully")
-            
-            # Ensure legal entity and legal entity site
-            logger.info(f"Ensuring legal entity exists: ref={buyer_info['legal_entity_ref']}, gstin={buyer_info.get('location_gstn')}")
-            await self.master_data_service.ensure_legal_entity(
-                entity_ref=buyer_info['legal_entity_ref'],
-                gstin=buyer_info.get('location_gstn')  # FIXED: was 'gstn', now 'gstin'
-            )
-            logger.info(f"✓ Legal entity ensured successfully")
-            
-            logger.info(f"Ensuring legal entity site exists: ref={buyer_info['legal_entity_site_ref']}")
-            await self.master_data_service.ensure_legal_entity_site(
-                site_ref=buyer_info['legal_entity_site_ref'],
-                entity_ref=buyer_info['legal_entity_ref'],
-                address=buyer_info.get('bill_to_address'),
-                gstin=buyer_info.get('location_gstn')  # FIXED: was 'gstn', now 'gstin'
-            )
-            logger.info(f"✓ Legal entity site ensured successfully")
-            
-            # Ensure all items exist
-            logger.info(f"Ensuring {len(item_info)} items exist...")
-            for idx, item in enumerate(item_info, 1):
-                logger.debug(f"Ensuring item {idx}/{len(item_info)}: {item['description'][:50]}...")
-                await self.master_data_service.ensure_item(
-                    item_ref=item['item_ref'],
-                    description=item['description'],
-                    hsn_code=item['hsn_code'],
-                    uom=item.get('uom', 'EA')
-                )
-            logger.info(f"✓ All {len(item_info)} items ensured successfully")
-            
-            # If PO exists, ensure its master data
+            # The PO tax rate is the only write whose result is needed back.
+            # It is shared by every PO with the same tax mix, so it commits
+            # on its own rather than staying locked for a whole invoice
             if po_header:
-                logger.info(f"Ensuring PO master data for PO: {po_header.s_po_number}")
-                logger.debug(f"Ensuring cost center: {po_header.s_cost_center_ref}")
-                await self.master_data_service.ensure_cost_center(po_header.s_cost_center_ref)
-                logger.debug(f"Ensuring profit center: {po_header.s_profit_center_ref}")
-                await self.master_data_service.ensure_profit_center(po_header.s_profit_center_ref)
-                logger.debug(f"Ensuring project: {po_header.s_project_ref}")
-                await self.master_data_service.ensure_project(po_header.s_project_ref)
-                logger.debug(f"Ensuring plant: {po_header.s_plant_ref}")
-                await self.master_data_service.ensure_plant(po_header.s_plant_ref)
-                logger.debug(f"Ensuring tax rate: {po_header.s_tax_rate_ref}")
-                await self.master_data_service.ensure_tax_rate(po_header.s_tax_rate_ref)
-                logger.info(f"✓ PO master data ensured successfully")
-            
-            # Ensure GL account for GRN
-            logger.info(f"Ensuring GL account: {grn_header.s_gl_account_ref}")
-            await self.master_data_service.ensure_gl_account(grn_header.s_gl_account_ref)
-            logger.info(f"✓ GL account ensured successfully")
-            
-            logger.info("=== ALL MASTER DATA ENSURED SUCCESSFULLY ===")
+                po_header.s_tax_rate_ref = await self.master_data_service.ensure_tax_rate(
+                    _tax_rate_name(po_conditions)
+                )
             
-            # Step 2: Insert PO Header if exists
-            logger.info("=== TRANSACTIONAL DATA INSERTION PHASE ===")
-            if po_header:
-                logger.info(f"Inserting PO Header: {po_header.s_po_number}")
-                await self._insert_po_header(po_header)
-                results["po_header_id"] = str(po_header.id)
-                logger.info(f"✓ PO Header inserted: {po_header.s_po_number}")
-                
-                # Insert PO Lines
-                logger.info(f"Inserting {len(po_lines)} PO Lines...")
-                for idx, po_line in enumerate(po_lines, 1):
-                    logger.debug(f"Inserting PO Line {idx}/{len(po_lines)}: {po_line.s_po_line_id}")
-                    await self._insert_po_line(po_line)
-                    results["po_lines_count"] += 1
-                logger.info(f"✓ {len(po_lines)} PO Lines inserted")
+            async with self.transaction():
+                # Step 1: Ensure all master data exists
+                logger.info("=== MASTER DATA INSERTION PHASE ===")
                 
-                # Insert PO Conditions
-                if po_conditions:
-                    logger.info(f"Inserting {len(po_conditions)} PO Conditions...")
-                    for idx, po_condition in enumerate(po_conditions, 1):
-                        logger.debug(f"Inserting PO Condition {idx}/{len(po_conditions)}: {po_condition.s_condition_type}")
-                        await self._insert_po_condition(po_condition)
-                        results["po_conditions_count"] += 1
-                    logger.info(f"✓ {len(po_conditions)} PO Conditions inserted")
-            else:
-                logger.info("No PO data to insert (invoice without PO reference)")
-            
-            # Step 3: Insert GRN Header
-            logger.info(f"Inserting GRN Header: {grn_header.s_grn_number}")
-            await self._insert_grn_header(grn_header)
-            logger.info(f"✓ GRN Header inserted: {grn_header.s_grn_number}")
+                # Every remaining statement, master data and transactional
+                # data alike, only writes, so send them back to back and
+                # wait for the server once instead of once per statement
+                async with self.pipeline():
+                    # Ensure supplier and supplier site
+                    await self.master_data_service.ensure_supplier(
+                        supplier_ref=supplier_info['supplier_ref'],
+                        supplier_name=supplier_info['supplier_name'],
+                        supplier_gstn=supplier_info.get('supplier_gstn')
+                    )
+                    
+                    await self.master_data_service.ensure_supplier_site(
+                        site_ref=supplier_info['supplier_site_ref'],
+                        supplier_ref=supplier_info['supplier_ref'],
+                        address=supplier_info.get('supplier_address'),
+                        gstin=supplier_info.get('supplier_gstn'),  # FIXED: was 'gstn', now 'gstin'
+                        country_id=country_id,
+                        state_id=state_id
+                    )
+                    
+                    # Ensure legal entity and legal entity site
+                    await self.master_data_service.ensure_legal_entity(
+                        entity_ref=buyer_info['legal_entity_ref'],
+                        gstin=buyer_info.get('location_gstn')  # FIXED: was 'gstn', now 'gstin'
+                    )
+                    
+                    await self.master_data_service.ensure_legal_entity_site(
+                        site_ref=buyer_info['legal_entity_site_ref'],
+                        entity_ref=buyer_info['legal_entity_ref'],
+                        address=buyer_info.get('bill_to_address'),
+                        gstin=buyer_info.get('location_gstn'),  # FIXED: was 'gstn', now 'gstin'
+                        country_id=country_id,
+                        state_id=state_id
+                    )
+                    
+                    # Ensure all items exist, in one statement
+                    await self.master_data_service.ensure_items_bulk(item_info)
+                    
+                    # If PO exists, ensure its master data
+                    if po_header:
+                        await self.master_data_service.ensure_cost_center(po_header.s_cost_center_ref)
+                        await self.master_data_service.ensure_profit_center(po_header.s_profit_center_ref)
+                        await self.master_data_service.ensure_project(po_header.s_project_ref)
+                        await self.master_data_service.ensure_plant(po_header.s_plant_ref)
+                    
+                    # Ensure GL account for GRN
+                    await self.master_data_service.ensure_gl_account(grn_header.s_gl_account_ref)
+                    
+                    # One summary line; each ensure_* call logs at DEBUG only
+                    logger.info(
+                        "=== ALL MASTER DATA ENSURED: supplier, legal entity, %d items%s, GL account ===",
+                        len(item_info), ", PO cost objects" if po_header else ""
+                    )
+                    
+                    # Step 2: Insert PO Header if exists
+                    logger.info("=== TRANSACTIONAL DATA INSERTION PHASE ===")
+                    if po_header:
+                        await self._insert_po_header(po_header)
+                        results["po_header_id"] = str(po_header.id)
+                        logger.info("✓ PO Header inserted: %s", po_header.s_po_number)
+                    
+                        # Insert PO Lines, even in buffer mode: the GRN
+                        # header references the first one
+                        await self._insert_po_lines(po_lines)
+                        logger.info("✓ %d PO Lines inserted", len(po_lines))
+                        results["po_lines_count"] = len(po_lines)
+                    
+                        # Insert PO Conditions
+                        if po_conditions and line_buffer is None:
+                            await self._insert_po_conditions(po_conditions)
+                            logger.info("✓ %d PO Conditions inserted", len(po_conditions))
+                            results["po_conditions_count"] = len(po_conditions)
+                    else:
+                        logger.info("No PO data to insert (invoice without PO reference)")
+                    
+                    # Step 3: Insert GRN Header
+                    await self._insert_grn_header(grn_header)
+                    logger.info("✓ GRN Header inserted: %s", grn_header.s_grn_number)
+                    
+                    # Step 4: Insert GRN Lines
+                    if line_buffer is None:
+                        await self._insert_grn_lines(grn_lines)
+                        logger.info("✓ %d GRN Lines inserted", len(grn_lines))
+                        results["grn_lines_count"] = len(grn_lines)
             
-            # Step 4: Insert GRN Lines
-            logger.info(f"Inserting {len(grn_lines)} GRN Lines...")
-            for idx, grn_line in enumerate(grn_lines, 1):
-                logger.debug(f"Inserting GRN Line {idx}/{len(grn_lines)}: {grn_line.s_grn_line_id}")
-                await self._insert_grn_line(grn_line)
-                results["grn_lines_count"] += 1
-            logger.info(f"✓ {len(grn_lines)} GRN Lines inserted")
+            # Headers and PO lines are committed; queued rows land with the
+            # next flush, so they are reported as queued, not inserted
+            if line_buffer is not None:
+                if po_header:
+                    line_buffer.put_nowait(
+                        _PO_CONDITION_TABLE, _PO_CONDITION_COLUMNS,
+                        self._po_condition_rows(po_conditions)
+                    )
+                    results["po_conditions_queued"] = len(po_conditions)
+                line_buffer.put_nowait(
+                    _GRN_LINE_TABLE, _GRN_LINE_COLUMNS, self._grn_line_rows(grn_lines)
+                )
+                results["grn_lines_queued"] = len(grn_lines)
+                logger.info(
+                    "Queued %d PO conditions, %d GRN lines for bulk insert",
+                    results["po_conditions_queued"], len(grn_lines)
+                )
             
             results["success"] = True
             logger.info("=== INVOICE INSERTION COMPLETED SUCCESSFULLY ===")
             
         except Exception as e:
-            logger.exception(f"❌ ERROR during invoice data insertion: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
-            logger.error(f"Error details: {str(e)}")
+            logger.exception("Error during invoice data insertion (%s): %s", type(e).__name__, e)
             results["errors"].append(str(e))
             raise
         
@@ -182,270 +322,60 @@ class DatabaseService:
     async def _insert_po_header(self, po_header: POHeader) -> None:
         """Insert PO Header into database"""
         try:
-            query = f"""
-                INSERT INTO {self.schema}.s_po_header (
-                    id, is_deleted, created_at, updated_at, created_by, updated_by,
-                    s_approved_by, s_cost_center_ref, s_created_by, s_currency_id,
-                    s_effective_from, s_effective_to, s_external_system, s_external_system_id,
-                    s_freight_included_flag, s_incoterms, s_legal_entity_ref, s_legal_entity_site_ref,
-                    s_matching_type, s_payment_terms, s_plant_ref, s_po_date,
-                    s_po_id, s_po_number, s_po_status, s_po_total_value,
-                    s_po_type, s_po_valid_from, s_po_valid_to, s_profit_center_ref,
-                    s_project_id, s_project_ref, s_supplier_ref, s_supplier_site_ref,
-                    s_tax_rate_ref
-                ) VALUES (
-                    '{po_header.id}', {po_header.is_deleted}, 
-                    '{self._format_timestamp(po_header.created_at)}',
-                    '{self._format_timestamp(po_header.updated_at)}',
-                    {self._format_uuid(po_header.created_by)},
-                    {self._format_uuid(po_header.updated_by)},
-                    {self._format_string(po_header.s_approved_by)},
-                    '{po_header.s_cost_center_ref}',
-                    '{po_header.s_created_by}',
-                    '{po_header.s_currency_id}',
-                    '{po_header.s_effective_from}',
-                    {self._format_date(po_header.s_effective_to)},
-                    {self._format_string(po_header.s_external_system)},
-                    {self._format_string(po_header.s_external_system_id)},
-                    {po_header.s_freight_included_flag},
-                    {self._format_string(po_header.s_incoterms)},
-                    '{po_header.s_legal_entity_ref}',
-                    '{po_header.s_legal_entity_site_ref}',
-                    '{po_header.s_matching_type}',
-                    '{po_header.s_payment_terms}',
-                    '{po_header.s_plant_ref}',
-                    '{po_header.s_po_date}',
-                    '{po_header.s_po_id}',
-                    '{po_header.s_po_number}',
-                    '{po_header.s_po_status}',
-                    {po_header.s_po_total_value},
-                    '{po_header.s_po_type}',
-                    {self._format_date(po_header.s_po_valid_from)},
-                    {self._format_date(po_header.s_po_valid_to)},
-                    '{po_header.s_profit_center_ref}',
-                    {self._format_string(po_header.s_project_id)},
-                    '{po_header.s_project_ref}',
-                    '{po_header.s_supplier_ref}',
-                    '{po_header.s_supplier_site_ref}',
-                    '{po_header.s_tax_rate_ref}'
-                );
-            """
-            await self.run_query(query)
+            await self.run_query(_PO_HEADER_SQL, _po_header_row(po_header))
         except Exception as e:
-            logger.error(f"Failed to insert PO header {po_header.s_po_number}: {e}")
+            logger.exception("Failed to insert PO header %s: %s", po_header.s_po_number, e)
             raise
     
-    async def _insert_po_line(self, po_line: POLine) -> None:
-        """Insert PO Line into database"""
+    async def _insert_po_lines(self, po_lines: List[POLine]) -> None:
+        """Insert PO Lines into database in one batch"""
         try:
-            query = f"""
-                INSERT INTO {self.schema}.s_po_line (
-                    id, is_deleted, created_at, updated_at, created_by, updated_by,
-                    s_batch_required_flag, s_cas_number, s_chemical_grade, s_closed_quantity,
-                    s_coa_required_flag, s_drawing_number, s_drawing_revision, s_effective_from,
-                    s_effective_to, s_expected_delivery_date, s_expiry_required_flag,
-                    s_external_system, s_external_system_id, s_hsn_id, s_item_ref,
-                    s_line_amount, s_line_number, s_line_status, s_ordered_quantity,
-                    s_po_header_ref, s_po_line_id, s_price_valid_from, s_price_valid_to,
-                    s_qc_required_flag, s_tolerance_pct, s_total_invoiced_qty,
-                    s_unit_price, s_uom_id
-                ) VALUES (
-                    '{po_line.id}', {po_line.is_deleted},
-                    '{self._format_timestamp(po_line.created_at)}',
-                    '{self._format_timestamp(po_line.updated_at)}',
-                    {self._format_uuid(po_line.created_by)},
-                    {self._format_uuid(po_line.updated_by)},
-                    {po_line.s_batch_required_flag},
-                    {self._format_string(po_line.s_cas_number)},
-                    {self._format_string(po_line.s_chemical_grade)},
-                    {self._format_numeric(po_line.s_closed_quantity)},
-                    {po_line.s_coa_required_flag},
-                    {self._format_string(po_line.s_drawing_number)},
-                    {self._format_string(po_line.s_drawing_revision)},
-                    '{po_line.s_effective_from}',
-                    {self._format_date(po_line.s_effective_to)},
-                    {self._format_date(po_line.s_expected_delivery_date)},
-                    {po_line.s_expiry_required_flag},
-                    {self._format_string(po_line.s_external_system)},
-                    {self._format_string(po_line.s_external_system_id)},
-                    '{po_line.s_hsn_id}',
-                    '{po_line.s_item_ref}',
-                    {self._format_numeric(po_line.s_line_amount)},
-                    {po_line.s_line_number},
-                    '{po_line.s_line_status}',
-                    {po_line.s_ordered_quantity},
-                    '{po_line.s_po_header_ref}',
-                    '{po_line.s_po_line_id}',
-                    {self._format_date(po_line.s_price_valid_from)},
-                    {self._format_date(po_line.s_price_valid_to)},
-                    {po_line.s_qc_required_flag},
-                    {self._format_numeric(po_line.s_tolerance_pct)},
-                    {self._format_numeric(po_line.s_total_invoiced_qty)},
-                    {po_line.s_unit_price},
-                    '{po_line.s_uom_id}'
-                );
-            """
-            await self.run_query(query)
+            await self.run_many(
+                _PO_LINE_TABLE, _PO_LINE_COLUMNS, self._po_line_rows(po_lines)
+            )
         except Exception as e:
-            logger.error(f"Failed to insert PO line {po_line.s_po_line_id}: {e}")
+            logger.exception("Failed to insert %d PO lines: %s", len(po_lines), e)
             raise
     
-    async def _insert_po_condition(self, po_condition: POCondition) -> None:
-        """Insert PO Condition into database"""
+    @staticmethod
+    def _po_line_rows(po_lines: List[POLine]) -> List[Tuple[Any, ...]]:
+        """Row tuples for s_po_line, in _PO_LINE_COLUMNS order"""
+        return list(map(_po_line_row, po_lines))
+    
+    async def _insert_po_conditions(self, po_conditions: List[POCondition]) -> None:
+        """Insert PO Conditions into database in one batch"""
         try:
-            query = f"""
-                INSERT INTO {self.schema}.s_po_condition (
-                    id, is_deleted, created_at, updated_at, created_by, updated_by,
-                    s_calculation_basis, s_condition_type, s_effective_from, s_effective_to,
-                    s_external_system, s_external_system_id, s_po_condition_id,
-                    s_po_header_ref, s_rate, s_uom_id
-                ) VALUES (
-                    '{po_condition.id}', {po_condition.is_deleted},
-                    '{self._format_timestamp(po_condition.created_at)}',
-                    '{self._format_timestamp(po_condition.updated_at)}',
-                    {self._format_uuid(po_condition.created_by)},
-                    {self._format_uuid(po_condition.updated_by)},
-                    '{po_condition.s_calculation_basis}',
-                    '{po_condition.s_condition_type}',
-                    '{po_condition.s_effective_from}',
-                    {self._format_date(po_condition.s_effective_to)},
-                    {self._format_string(po_condition.s_external_system)},
-                    {self._format_string(po_condition.s_external_system_id)},
-                    '{po_condition.s_po_condition_id}',
-                    '{po_condition.s_po_header_ref}',
-                    {po_condition.s_rate},
-                    '{po_condition.s_uom_id}'
-                );
-            """
-            await self.run_query(query)
+            await self.run_many(
+                _PO_CONDITION_TABLE, _PO_CONDITION_COLUMNS, self._po_condition_rows(po_conditions)
+            )
         except Exception as e:
-            logger.error(f"Failed to insert PO condition {po_condition.s_po_condition_id}: {e}")
+            logger.exception("Failed to insert %d PO conditions: %s", len(po_conditions), e)
             raise
     
+    @staticmethod
+    def _po_condition_rows(po_conditions: List[POCondition]) -> List[Tuple[Any, ...]]:
+        """Row tuples for s_po_condition, in _PO_CONDITION_COLUMNS order"""
+        return list(map(_po_condition_row, po_conditions))
+    
     async def _insert_grn_header(self, grn_header: GRNHeader) -> None:
         """Insert GRN Header into database"""
         try:
-            query = f"""
-                INSERT INTO {self.schema}.s_grn_header (
-                    id, is_deleted, created_at, updated_at, created_by, updated_by,
-                    s_effective_from, s_effective_to, s_external_system, s_external_system_id,
-                    s_gl_account_ref, s_grn_date, s_grn_id, s_grn_number,
-                    s_grn_status, s_legal_entity_site_ref, s_po_line_ref, s_qc_status,
-                    s_supplier_site_ref, s_total_received_amount, s_total_received_qty,
-                    s_total_received_weight, s_transport_mode, s_weight_uom_id
-                ) VALUES (
-                    '{grn_header.id}', {grn_header.is_deleted},
-                    '{self._format_timestamp(grn_header.created_at)}',
-                    '{self._format_timestamp(grn_header.updated_at)}',
-                    {self._format_uuid(grn_header.created_by)},
-                    {self._format_uuid(grn_header.updated_by)},
-                    '{grn_header.s_effective_from}',
-                    {self._format_date(grn_header.s_effective_to)},
-                    {self._format_string(grn_header.s_external_system)},
-                    {self._format_string(grn_header.s_external_system_id)},
-                    '{grn_header.s_gl_account_ref}',
-                    '{grn_header.s_grn_date}',
-                    '{grn_header.s_grn_id}',
-                    '{grn_header.s_grn_number}',
-                    '{grn_header.s_grn_status}',
-                    '{grn_header.s_legal_entity_site_ref}',
-                    '{grn_header.s_po_line_ref}',
-                    '{grn_header.s_qc_status}',
-                    '{grn_header.s_supplier_site_ref}',
-                    {grn_header.s_total_received_amount},
-                    {grn_header.s_total_received_qty},
-                    {self._format_numeric(grn_header.s_total_received_weight)},
-                    {self._format_string(grn_header.s_transport_mode)},
-                    '{grn_header.s_weight_uom_id}'
-                );
-            """
-            await self.run_query(query)
+            await self.run_query(_GRN_HEADER_SQL, _grn_header_row(grn_header))
         except Exception as e:
-            logger.error(f"Failed to insert GRN header {grn_header.s_grn_number}: {e}")
+            logger.exception("Failed to insert GRN header %s: %s", grn_header.s_grn_number, e)
             raise
     
-    async def _insert_grn_line(self, grn_line: GRNLine) -> None:
-        """Insert GRN Line into database"""
+    async def _insert_grn_lines(self, grn_lines: List[GRNLine]) -> None:
+        """Insert GRN Lines into database in one batch"""
         try:
-            query = f"""
-                INSERT INTO {self.schema}.s_grn_line (
-                    id, is_deleted, created_at, updated_at, created_by, updated_by,
-                    s_grn_line_id, s_item_description, s_drawing_number, s_drawing_revision,
-                    s_uom_id, s_received_qty, s_unit_price, s_total_received_amount,
-                    s_accepted_qty, s_rejected_qty, s_rejection_reason, s_received_weight,
-                    s_weight_uom, s_qc_required_flag, s_qc_result, s_grn_line_status,
-                    s_batch_number, s_manufacture_date, s_expiry_date, s_compliance_verified_flag,
-                    s_grn_ref, s_item_ref, s_effective_from, s_effective_to,
-                    s_external_system_id, s_external_system
-                ) VALUES (
-                    '{grn_line.id}', {grn_line.is_deleted},
-                    '{self._format_timestamp(grn_line.created_at)}',
-                    '{self._format_timestamp(grn_line.updated_at)}',
-                    {self._format_uuid(grn_line.created_by)},
-                    {self._format_uuid(grn_line.updated_by)},
-                    '{grn_line.s_grn_line_id}',
-                    '{self._escape_string(grn_line.s_item_description)}',
-                    {self._format_string(grn_line.s_drawing_number)},
-                    {self._format_string(grn_line.s_drawing_revision)},
-                    '{grn_line.s_uom_id}',
-                    {grn_line.s_received_qty},
-                    {self._format_numeric(grn_line.s_unit_price)},
-                    {self._format_numeric(grn_line.s_total_received_amount)},
-                    {self._format_numeric(grn_line.s_accepted_qty)},
-                    {self._format_numeric(grn_line.s_rejected_qty)},
-                    {self._format_string(grn_line.s_rejection_reason)},
-                    {self._format_numeric(grn_line.s_received_weight)},
-                    '{grn_line.s_weight_uom}',
-                    {grn_line.s_qc_required_flag},
-                    '{grn_line.s_qc_result}',
-                    '{grn_line.s_grn_line_status}',
-                    {self._format_string(grn_line.s_batch_number)},
-                    {self._format_date(grn_line.s_manufacture_date)},
-                    {self._format_date(grn_line.s_expiry_date)},
-                    {grn_line.s_compliance_verified_flag},
-                    '{grn_line.s_grn_ref}',
-                    '{grn_line.s_item_ref}',
-                    '{grn_line.s_effective_from}',
-                    {self._format_date(grn_line.s_effective_to)},
-                    {self._format_string(grn_line.s_external_system_id)},
-                    {self._format_string(grn_line.s_external_system)}
-                );
-            """
-            await self.run_query(query)
+            await self.run_many(
+                _GRN_LINE_TABLE, _GRN_LINE_COLUMNS, self._grn_line_rows(grn_lines)
+            )
         except Exception as e:
-            logger.error(f"Failed to insert GRN line {grn_line.s_grn_line_id}: {e}")
+            logger.exception("Failed to insert %d GRN lines: %s", len(grn_lines), e)
             raise
     
-    # Helper formatting methods
-    
-    def _format_timestamp(self, dt: datetime) -> str:
-        """Format datetime for PostgreSQL"""
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    
-    def _format_date(self, d: Optional[date]) -> str:
-        """Format date for PostgreSQL"""
-        if d is None:
-            return "NULL"
-        return f"'{d}'"
-    
-    def _format_uuid(self, uuid_val: Optional[UUID]) -> str:
-        """Format UUID for PostgreSQL"""
-        if uuid_val is None:
-            return "NULL"
-        return f"'{uuid_val}'"
-    
-    def _format_string(self, s: Optional[str]) -> str:
-        """Format string for PostgreSQL"""
-        if s is None:
-            return "NULL"
-        return f"'{self._escape_string(s)}'"
-    
-    def _format_numeric(self, n: Optional[float]) -> str:
-        """Format numeric value for PostgreSQL"""
-        if n is None:
-            return "NULL"
-        return str(n)
-    
-    def _escape_string(self, s: str) -> str:
-        """Escape single quotes in strings"""
-        return s.replace("'", "''")
+    @staticmethod
+    def _grn_line_rows(grn_lines: List[GRNLine]) -> List[Tuple[Any, ...]]:
+        """Row tuples for s_grn_line, in _GRN_LINE_COLUMNS order"""
+        return list(map(_grn_line_row, grn_lines))
@@ -2,12 +2,14 @@
 Service for mapping OCR data to database models
 Uses actual data from OCR input without generation
 """
-from datetime import datetime, date, timedelta
-from typing import List, Tuple, Optional, Dict, Any
+from collections import OrderedDict
+from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+from typing import List, Tuple, Optional, Dict, Any, NamedTuple
 from uuid import UUID
-import random
+import re
 
-from models.ocr_input import OCRInput, InvoiceLine, StaticData
+from models.ocr_input import OCRInput, InvoiceLine
 from models.db_models import (
     GRNHeader, GRNLine, POHeader, POLine, POCondition
 )
@@ -17,16 +19,71 @@ from utils.helpers import (
 from logs.log import logger
 
 
+# Pure string -> value parsers; OCR batches repeat the same few dates and
+# tax rates ("18%", "9") across lines and invoices, so memoize them
+_parse_date = lru_cache(maxsize=1024)(DataTransformer.parse_date)
+_parse_rate = lru_cache(maxsize=1024)(DataTransformer.extract_tax_rate)
+
+# Pure string -> string normalizers; HSN codes, UOMs and supplier/buyer
+# names come from small catalogs that repeat across invoices
+_extract_hsn_code = lru_cache(maxsize=2048)(DataTransformer.extract_hsn_code)
+_normalize_uom = lru_cache(maxsize=256)(DataTransformer.normalize_uom)
+_clean_string = lru_cache(maxsize=2048)(DataTransformer.clean_string)
+
+
+# PO type indicators, matched as case-insensitive substrings of line descriptions
+_SERVICE_KEYWORDS = re.compile('service|consulting|maintenance|support|license', re.IGNORECASE)
+_CAPEX_KEYWORDS = re.compile('equipment|machinery|capital|installation|infrastructure', re.IGNORECASE)
+
+
+# Payment terms (SAP codes), invoice matching type and incoterms per PO type
+_PO_TYPE_TERMS = {
+    'MATERIAL': ('0002', '3WAY', 'DDP'),  # Net 30
+    'SERVICE': ('0003', '2WAY', 'DDP'),   # Net 45
+    'CAPEX': ('0004', '2WAY', 'EXW'),     # Net 60
+}
+_DEFAULT_PO_TERMS = ('0002', '2WAY', 'DDP')
+
+
+# POs raised from invoices stay valid for a year
+_PO_VALIDITY = timedelta(days=365)
+
+
+# Tax condition type, StaticData field and InvoiceLine field carrying its rate
+_TAX_KINDS = (
+    ('IGST', 'igst', 'igst_rate'),
+    ('CGST', 'cgst', 'cgst_rate'),
+    ('SGST', 'sgst', 'sgst_rate'),
+)
+
+
+class _LineValues(NamedTuple):
+    """Parsed, ID-free values of one OCR invoice line"""
+    hsn_code: str
+    item_description: str
+    clean_description: str
+    uom: str
+    quantity: float
+    unit_price: float
+    line_amount: float
+
+
 class OCRMapper:
     """
     Maps OCR extracted data to database models
     Following SAP MM and Oracle Procurement Cloud standards
     """
     
+    __slots__ = ('id_gen', 'transformer', 'resolver', '_line_cache')
+    
+    # Recently parsed invoice lines; suppliers resend the same items
+    LINE_CACHE_SIZE = 128
+    
     def __init__(self):
         self.id_gen = IDGenerator()
         self.transformer = DataTransformer()
         self.resolver = ReferenceResolver(placeholder_mode=True)
+        self._line_cache: "OrderedDict[tuple, _LineValues]" = OrderedDict()
     
     def map_to_database_models(
         self, 
@@ -51,38 +108,47 @@ class OCRMapper:
         static = ocr_data.static
         lines = ocr_data.dynamic
         
+        # One timestamp and one urandom read for every row of this invoice:
+        # PO header + PO lines + GRN header + GRN lines. UTC-aware, so it is
+        # read as the same instant as the server-side now() of master data
+        now = datetime.now(timezone.utc)
+        row_ids = iter(self.id_gen.bulk_generate(2 + 2 * len(lines)))
+        
+        # First value of every field OCR actually filled in, extracted once
+        fields = static.first_values()
+        
         # Extract and validate common data - USE FROM INPUT, DON'T GENERATE
-        invoice_no = self._extract_invoice_number(static)
-        invoice_date = self._extract_invoice_date(static)
-        po_number = self._extract_po_number(static, lines)  # FROM INPUT ONLY
+        invoice_no = self._extract_invoice_number(fields)
+        invoice_date = self._extract_invoice_date(fields)
+        po_number = self._extract_po_number(fields, lines)  # FROM INPUT ONLY
         
         # Supplier information
-        supplier_name = self.transformer.clean_string(
-            self.transformer.extract_first(static.supplier_name),
+        supplier_name = _clean_string(
+            fields.get("supplier_name"),
             max_length=255
         ) or "Unknown Supplier"
-        supplier_gstn = self.transformer.clean_string(
-            self.transformer.extract_first(static.supplier_gstn),
+        supplier_gstn = _clean_string(
+            fields.get("supplier_gstn"),
             max_length=15
         )
-        supplier_address = self.transformer.clean_string(
-            self.transformer.extract_first(static.supplier_address),
+        supplier_address = _clean_string(
+            fields.get("supplier_address"),
             max_length=500
         )
         
         # Buyer information
-        location_gstn = self.transformer.clean_string(
-            self.transformer.extract_first(static.location_gstn),
+        location_gstn = _clean_string(
+            fields.get("location_gstn"),
             max_length=15
         )
-        bill_to_address = self.transformer.clean_string(
-            self.transformer.extract_first(static.bill_to_address),
+        bill_to_address = _clean_string(
+            fields.get("bill_to_address"),
             max_length=500
         )
         
         # Currency
         currency = self.resolver.resolve_currency_id(
-            self.transformer.extract_first(static.invoice_currency) or "INR"
+            fields.get("invoice_currency") or "INR"
         )
         
         # Resolve master data references
@@ -108,29 +174,63 @@ class OCRMapper:
             'bill_to_address': bill_to_address
         }
         
-        # Determine PO type based on item descriptions or default to MATERIAL
-        po_type = self._determine_po_type(lines)
-        
-        # Prepare item info for master data insertion
+        # Single pass over the lines: parse each one, resolve item refs once
+        # per distinct item (shared by the PO and GRN lines), accumulate
+        # the header totals and scan descriptions for PO type keywords
+        line_values = []
         item_info = []
+        item_refs: Dict[Tuple[str, Optional[str]], UUID] = {}
+        po_total = 0.0
+        total_qty = 0.0
+        is_service = is_capex = False
+        # Hot loop: bind the per-line callables to locals once
+        parse_line = self._line_values
+        resolve_item_ref = self.resolver.resolve_item_ref
+        search_service = _SERVICE_KEYWORDS.search
+        search_capex = _CAPEX_KEYWORDS.search
+        safe_float = self.transformer.safe_float
+        for line in lines:
+            values = parse_line(line)
+            line_values.append(values)
+            # Header totals keep their own rules: only stated line amounts
+            # count (no qty * price fallback), at 2-decimal precision
+            po_total += safe_float(line.line_amount)
+            total_qty += safe_float(line.quantity)
+            
+            # Service keywords win over CAPEX ones anywhere on the invoice
+            description = line.description
+            if description and not is_service:
+                if search_service(description):
+                    is_service = True
+                elif not is_capex and search_capex(description):
+                    is_capex = True
+            
+            key = (values.item_description, values.hsn_code)
+            item_ref = item_refs.get(key)
+            if item_ref is None:
+                item_ref = item_refs[key] = resolve_item_ref(*key)
+            item_info.append({
+                'item_ref': item_ref,
+                'description': values.item_description,
+                'hsn_code': values.hsn_code,
+                'uom': values.uom
+            })
+        
+        # PO type from the item descriptions, defaulting to MATERIAL
+        po_type = "SERVICE" if is_service else "CAPEX" if is_capex else "MATERIAL"
         
         # Create PO Header and Lines
         po_header = None
         po_lines = []
-        po_line_refs = {}
         
         if po_number:
             # Use actual PO number from input - DON'T GENERATE
             po_id = self.id_gen.generate_po_id(po_number)
             
-            # Calculate PO total
-            po_total = sum(
-                self.transformer.safe_float(line.line_amount)
-                for line in lines
-            )
-            
             # Create PO Header
             po_header = self._create_po_header(
+                row_id=next(row_ids),
+                now=now,
                 po_number=po_number,  # FROM INPUT
                 po_id=po_id,
                 po_type=po_type,
@@ -140,61 +240,36 @@ class OCRMapper:
                 legal_entity_ref=legal_entity_ref,
                 legal_entity_site_ref=legal_entity_site_ref,
                 currency=currency,
-                total_value=po_total
+                total_value=po_total,
+                placeholder_refs=self._po_placeholder_refs()
             )
             
-            # Create PO Lines and collect item info
-            for idx, line in enumerate(lines, start=1):
-                hsn_code = self.transformer.extract_hsn_code(line.hsn_number)
-                item_description = line.description or "UNKNOWN"
-                uom = self.transformer.normalize_uom(line.unit)
-                
-                item_ref = self.resolver.resolve_item_ref(item_description, hsn_code)
-                
-                # Add to item info for master data insertion
-                item_info.append({
-                    'item_ref': item_ref,
-                    'description': item_description,
-                    'hsn_code': hsn_code,
-                    'uom': uom
-                })
-                
-                po_line = self._create_po_line(
+            # Create PO Lines; every line shares the invoice's expected
+            # delivery date (typical lead time: 14 days)
+            expected_delivery = self.transformer.calculate_expected_delivery_date(invoice_date, 14)
+            po_lines = [
+                self._create_po_line(
+                    row_id=next(row_ids),
+                    now=now,
                     po_header_ref=po_header.id,
                     po_id=po_id,
                     line_number=idx,
-                    line_data=line,
+                    values=values,
                     effective_from=invoice_date,
-                    po_date=invoice_date,
-                    item_ref=item_ref,
-                    hsn_code=hsn_code,
-                    uom=uom
+                    expected_delivery=expected_delivery,
+                    item_ref=item['item_ref']
                 )
-                po_lines.append(po_line)
-                po_line_refs[idx] = po_line.id
-        else:
-            # No PO number - still need to collect item info for GRN
-            for idx, line in enumerate(lines, start=1):
-                hsn_code = self.transformer.extract_hsn_code(line.hsn_number)
-                item_description = line.description or "UNKNOWN"
-                uom = self.transformer.normalize_uom(line.unit)
-                
-                item_ref = self.resolver.resolve_item_ref(item_description, hsn_code)
-                
-                item_info.append({
-                    'item_ref': item_ref,
-                    'description': item_description,
-                    'hsn_code': hsn_code,
-                    'uom': uom
-                })
+                for idx, (values, item) in enumerate(zip(line_values, item_info), start=1)
+            ]
         
         # Create PO Conditions (Tax)
         po_conditions = []
         if po_header:
             po_conditions = self._create_po_conditions(
+                now=now,
                 po_header_ref=po_header.id,
                 po_id=po_header.s_po_id,
-                static=static,
+                fields=fields,
                 lines=lines,
                 effective_from=invoice_date
             )
@@ -203,23 +278,21 @@ class OCRMapper:
         grn_number = self.id_gen.generate_grn_number()
         grn_id = self.id_gen.generate_grn_id(grn_number)
         
-        # Calculate GRN totals
-        total_qty = sum(
-            self.transformer.safe_float(line.quantity) 
-            for line in lines
-        )
+        # GRN total amount comes from the invoice header
         total_amount = self.transformer.safe_float(
-            self.transformer.extract_first(static.subtotal) or
-            self.transformer.extract_first(static.total_invoice_amount)
+            fields.get("subtotal") or
+            fields.get("total_invoice_amount")
         )
         
         # Create GRN Header
         first_po_line_ref = (
-            po_line_refs.get(1) if po_line_refs 
+            po_lines[0].id if po_lines
             else self.resolver.resolve_project_ref()
         )
         
         grn_header = self._create_grn_header(
+            row_id=next(row_ids),
+            now=now,
             grn_number=grn_number,
             grn_id=grn_id,
             grn_date=invoice_date,
@@ -228,48 +301,98 @@ class OCRMapper:
             po_line_ref=first_po_line_ref,
             total_qty=total_qty,
             total_amount=total_amount,
+            gl_account_ref=self.resolver.resolve_gl_account_ref(),
             effective_from=invoice_date
         )
         
-        # Create GRN Lines
-        grn_lines = []
-        for idx, line in enumerate(lines, start=1):
-            grn_line = self._create_grn_line(
+        # Create GRN Lines, each with its own batch number for the material
+        batch_numbers = self.id_gen.generate_batch_numbers(len(lines), invoice_date)
+        grn_lines = [
+            self._create_grn_line(
+                row_id=next(row_ids),
+                now=now,
                 grn_ref=grn_header.id,
                 grn_id=grn_id,
                 line_number=idx,
-                line_data=line,
+                values=values,
                 effective_from=invoice_date,
-                item_info=item_info[idx-1]
+                item_ref=item['item_ref'],
+                batch_number=batch_number
             )
-            grn_lines.append(grn_line)
+            for idx, (values, item, batch_number) in enumerate(
+                zip(line_values, item_info, batch_numbers), start=1
+            )
+        ]
         
         logger.info(
             "Mapped OCR data: invoice=%s, po=%s, grn=%s, lines=%d",
-            invoice_no, po_number or "N/A", grn_number, len(lines)
+            invoice_no, po_number or 'N/A', grn_number, len(lines)
         )
         
         return (po_header, po_lines, po_conditions, grn_header, grn_lines,
                 supplier_info, buyer_info, item_info)
     
-    def _extract_invoice_number(self, static: StaticData) -> str:
+    def _line_values(self, line: InvoiceLine) -> _LineValues:
+        """
+        Parse the ID-free values of an invoice line, reusing recent results
+        
+        Only deterministic parsing is cached; refs, IDs and batch numbers
+        are still generated per line by the callers.
+        """
+        cache = self._line_cache
+        key = (line.description, line.hsn_number, line.unit,
+               line.quantity, line.unit_price, line.line_amount)
+        values = cache.get(key)
+        if values is not None:
+            cache.move_to_end(key)
+            return values
+        
+        # Extract and validate amounts
+        safe_float = self.transformer.safe_float
+        quantity = safe_float(line.quantity, precision=3)
+        unit_price = safe_float(line.unit_price, precision=4)
+        line_amount = safe_float(line.line_amount, precision=2)
+        
+        # Validate line amount
+        if line_amount == 0 and quantity > 0 and unit_price > 0:
+            line_amount = round(quantity * unit_price, 2)
+        
+        values = _LineValues(
+            hsn_code=_extract_hsn_code(line.hsn_number),
+            item_description=line.description or "UNKNOWN",
+            clean_description=_clean_string(
+                line.description or "UNKNOWN",
+                max_length=255
+            ) or "UNKNOWN",
+            uom=_normalize_uom(line.unit),
+            quantity=quantity,
+            unit_price=unit_price,
+            line_amount=line_amount
+        )
+        
+        cache[key] = values
+        if len(cache) > self.LINE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return values
+    
+    def _extract_invoice_number(self, fields: Dict[str, str]) -> str:
         """Extract and clean invoice number"""
-        invoice_no = self.transformer.extract_first(static.invoice_no)
+        invoice_no = fields.get("invoice_no")
         if not invoice_no:
             # Generate fallback invoice number
             invoice_no = f"INV{datetime.now().strftime('%Y%m%d%H%M%S')}"
         return self.transformer.clean_string(invoice_no, max_length=50) or "UNKNOWN"
     
-    def _extract_invoice_date(self, static: StaticData) -> date:
+    def _extract_invoice_date(self, fields: Dict[str, str]) -> date:
         """Extract and parse invoice date"""
-        date_str = self.transformer.extract_first(static.invoice_date)
-        parsed_date = self.transformer.parse_date(date_str)
+        date_str = fields.get("invoice_date")
+        parsed_date = _parse_date(date_str)
         return parsed_date or date.today()
     
-    def _extract_po_number(self, static: StaticData, lines: List[InvoiceLine]) -> Optional[str]:
+    def _extract_po_number(self, fields: Dict[str, str], lines: List[InvoiceLine]) -> Optional[str]:
         """Extract PO number from static or line data - NEVER GENERATE"""
         # Try static first
-        po_number = self.transformer.extract_first(static.po_number)
+        po_number = fields.get("po_number")
         
         # If not in static, try first line
         if not po_number and lines:
@@ -281,35 +404,20 @@ class OCRMapper:
         # Return None if not found - DON'T GENERATE
         return None
     
-    def _determine_po_type(self, lines: List[InvoiceLine]) -> str:
-        """
-        Determine PO type based on line items
-        Returns: MATERIAL, SERVICE, or CAPEX
-        """
-        if not lines:
-            return "MATERIAL"
-        
-        # Check descriptions for keywords
-        descriptions = ' '.join(
-            (line.description or '').lower() 
-            for line in lines
-        )
-        
-        # Service indicators
-        service_keywords = ['service', 'consulting', 'maintenance', 'support', 'license']
-        if any(keyword in descriptions for keyword in service_keywords):
-            return "SERVICE"
-        
-        # CAPEX indicators  
-        capex_keywords = ['equipment', 'machinery', 'capital', 'installation', 'infrastructure']
-        if any(keyword in descriptions for keyword in capex_keywords):
-            return "CAPEX"
-        
-        # Default to MATERIAL
-        return "MATERIAL"
+    def _po_placeholder_refs(self) -> Dict[str, UUID]:
+        """Resolve the placeholder master data refs of a PO header, once per invoice"""
+        return {
+            's_cost_center_ref': self.resolver.resolve_cost_center_ref(),
+            's_profit_center_ref': self.resolver.resolve_profit_center_ref(),
+            's_project_ref': self.resolver.resolve_project_ref(),
+            's_plant_ref': self.resolver.resolve_plant_ref(),
+            's_tax_rate_ref': self.resolver.resolve_tax_rate_ref(0.0),
+        }
     
     def _create_po_header(
         self,
+        row_id: UUID,
+        now: datetime,
         po_number: str,
         po_id: str,
         po_type: str,
@@ -319,25 +427,19 @@ class OCRMapper:
         legal_entity_ref: UUID,
         legal_entity_site_ref: UUID,
         currency: str,
-        total_value: float
+        total_value: float,
+        placeholder_refs: Dict[str, UUID]
     ) -> POHeader:
         """Create PO Header model with realistic data"""
         
-        # Payment terms based on PO type
-        payment_terms_map = {
-            'MATERIAL': '0002',  # SAP code for Net 30
-            'SERVICE': '0003',   # Net 45
-            'CAPEX': '0004'      # Net 60
-        }
-        payment_terms = payment_terms_map.get(po_type, '0002')
-        
-        # Matching type
-        matching_type = '3WAY' if po_type == 'MATERIAL' else '2WAY'
-        
-        # Incoterms based on typical scenarios
-        incoterms = 'EXW' if po_type == 'CAPEX' else 'DDP'
+        payment_terms, matching_type, incoterms = _PO_TYPE_TERMS.get(
+            po_type, _DEFAULT_PO_TERMS
+        )
         
         return POHeader(
+            id=row_id,
+            created_at=now,
+            updated_at=now,
             s_po_number=po_number,  # FROM INPUT
             s_po_id=po_id,
             s_po_date=po_date,
@@ -349,17 +451,13 @@ class OCRMapper:
             s_legal_entity_site_ref=legal_entity_site_ref,
             s_currency_id=currency,
             s_po_total_value=total_value,
-            s_cost_center_ref=self.resolver.resolve_cost_center_ref(),
-            s_profit_center_ref=self.resolver.resolve_profit_center_ref(),
-            s_project_ref=self.resolver.resolve_project_ref(),
-            s_plant_ref=self.resolver.resolve_plant_ref(),
-            s_tax_rate_ref=self.resolver.resolve_tax_rate_ref(0.0),
+            **placeholder_refs,
             s_created_by='OCR_AUTOMATION',
             s_payment_terms=payment_terms,
             s_matching_type=matching_type,
             s_effective_from=po_date,
             s_po_valid_from=po_date,
-            s_po_valid_to=po_date + timedelta(days=365),
+            s_po_valid_to=po_date + _PO_VALIDITY,
             s_incoterms=incoterms,
             s_freight_included_flag=(po_type == 'MATERIAL'),
             s_external_system='INVOICE_OCR',
@@ -368,46 +466,38 @@ class OCRMapper:
     
     def _create_po_line(
         self,
+        row_id: UUID,
+        now: datetime,
         po_header_ref: UUID,
         po_id: str,
         line_number: int,
-        line_data: InvoiceLine,
+        values: _LineValues,
         effective_from: date,
-        po_date: date,
-        item_ref: UUID,
-        hsn_code: str,
-        uom: str
+        expected_delivery: date,
+        item_ref: UUID
     ) -> POLine:
         """Create PO Line model with realistic data"""
         
         po_line_id = self.id_gen.generate_po_line_id(po_id, line_number)
-        
-        # Extract and validate amounts
-        quantity = self.transformer.safe_float(line_data.quantity, precision=3)
-        unit_price = self.transformer.safe_float(line_data.unit_price, precision=4)
-        line_amount = self.transformer.safe_float(line_data.line_amount, precision=2)
-        
-        # Validate line amount
-        if line_amount == 0 and quantity > 0 and unit_price > 0:
-            line_amount = round(quantity * unit_price, 2)
-        
-        # Expected delivery date (typical lead time: 14 days)
-        expected_delivery = self.transformer.calculate_expected_delivery_date(po_date, 14)
+        quantity = values.quantity
         
         # Tolerance percentage (typical: 5-10%)
         tolerance_pct = 5.0 if quantity < 100 else 10.0
         
         return POLine(
+            id=row_id,
+            created_at=now,
+            updated_at=now,
             s_po_header_ref=po_header_ref,
             s_po_line_id=po_line_id,
             s_line_number=float(line_number * 10),
             s_line_status='OPEN',
             s_item_ref=item_ref,
-            s_hsn_id=hsn_code,
+            s_hsn_id=values.hsn_code,
             s_ordered_quantity=quantity,
-            s_unit_price=unit_price,
-            s_line_amount=line_amount,
-            s_uom_id=uom,
+            s_unit_price=values.unit_price,
+            s_line_amount=values.line_amount,
+            s_uom_id=values.uom,
             s_effective_from=effective_from,
             s_expected_delivery_date=expected_delivery,
             s_qc_required_flag=True,
@@ -416,68 +506,64 @@ class OCRMapper:
             s_coa_required_flag=False,
             s_tolerance_pct=tolerance_pct,
             s_external_system='INVOICE_OCR',
-            s_external_system_id=str(line_number)[:10]
+            s_external_system_id=str(line_number)
         )
     
     def _create_po_conditions(
         self,
+        now: datetime,
         po_header_ref: UUID,
         po_id: str,
-        static: StaticData,
+        fields: Dict[str, str],
         lines: List[InvoiceLine],
         effective_from: date
     ) -> List[POCondition]:
         """Create PO Condition models for taxes with realistic data"""
-        conditions = []
+        # Static rates first, then each line's, in _TAX_KINDS order
+        raw_rates = [
+            (tax_type, fields.get(static_field))
+            for tax_type, static_field, _ in _TAX_KINDS
+        ]
+        raw_rates.extend(
+            (tax_type, getattr(line, line_field))
+            for line in lines
+            for tax_type, _, line_field in _TAX_KINDS
+        )
         
-        # Helper to create condition
-        def add_condition(tax_type: str, rate_str: Optional[str]):
+        # One condition per (type, rate), keeping the first occurrence;
+        # duplicates are dropped before any model or ID is built
+        generate_condition_id = self.id_gen.generate_po_condition_id
+        seen = set()
+        conditions = []
+        for tax_type, rate_str in raw_rates:
             if not rate_str:
-                return
+                continue
             
-            rate = self.transformer.extract_tax_rate(rate_str)
-            if rate > 0:
-                condition_id = self.id_gen.generate_po_condition_id(po_id, tax_type)
-                
-                conditions.append(POCondition(
-                    s_po_header_ref=po_header_ref,
-                    s_po_condition_id=condition_id,
-                    s_condition_type=tax_type,
-                    s_calculation_basis='PERCENT',
-                    s_rate=rate,
-                    s_uom_id='%',
-                    s_effective_from=effective_from,
-                    s_external_system='INVOICE_OCR',
-                    s_external_system_id=tax_type[:10]
-                ))
-        
-        # Process tax conditions from static data
-        add_condition('IGST', self.transformer.extract_first(static.igst))
-        add_condition('CGST', self.transformer.extract_first(static.cgst))
-        add_condition('SGST', self.transformer.extract_first(static.sgst))
-        
-        # Also check line-level tax rates
-        for line in lines:
-            if line.igst_rate:
-                add_condition('IGST', line.igst_rate)
-            if line.cgst_rate:
-                add_condition('CGST', line.cgst_rate)
-            if line.sgst_rate:
-                add_condition('SGST', line.sgst_rate)
-        
-        # Remove duplicates (keep first occurrence)
-        seen = set()
-        unique_conditions = []
-        for cond in conditions:
-            key = (cond.s_condition_type, cond.s_rate)
-            if key not in seen:
-                seen.add(key)
-                unique_conditions.append(cond)
-        
-        return unique_conditions
+            rate = _parse_rate(rate_str)
+            if rate <= 0 or (tax_type, rate) in seen:
+                continue
+            seen.add((tax_type, rate))
+            
+            conditions.append(POCondition(
+                created_at=now,
+                updated_at=now,
+                s_po_header_ref=po_header_ref,
+                s_po_condition_id=generate_condition_id(po_id, tax_type),
+                s_condition_type=tax_type,
+                s_calculation_basis='PERCENT',
+                s_rate=rate,
+                s_uom_id='%',
+                s_effective_from=effective_from,
+                s_external_system='INVOICE_OCR',
+                s_external_system_id=tax_type
+            ))
+        
+        return conditions
     
     def _create_grn_header(
         self,
+        row_id: UUID,
+        now: datetime,
         grn_number: str,
         grn_id: str,
         grn_date: date,
@@ -486,6 +572,7 @@ class OCRMapper:
         po_line_ref: UUID,
         total_qty: float,
         total_amount: float,
+        gl_account_ref: UUID,
         effective_from: date
     ) -> GRNHeader:
         """Create GRN Header model with realistic data"""
@@ -495,6 +582,9 @@ class OCRMapper:
         transport_mode = 'ROAD'
         
         return GRNHeader(
+            id=row_id,
+            created_at=now,
+            updated_at=now,
             s_grn_number=grn_number,
             s_grn_id=grn_id,
             s_grn_date=grn_date,
@@ -503,7 +593,7 @@ class OCRMapper:
             s_supplier_site_ref=supplier_site_ref,
             s_legal_entity_site_ref=legal_entity_site_ref,
             s_po_line_ref=po_line_ref,
-            s_gl_account_ref=self.resolver.resolve_gl_account_ref(),
+            s_gl_account_ref=gl_account_ref,
             s_total_received_qty=total_qty,
             s_total_received_amount=total_amount,
             s_weight_uom_id='KG',
@@ -515,54 +605,43 @@ class OCRMapper:
     
     def _create_grn_line(
         self,
+        row_id: UUID,
+        now: datetime,
         grn_ref: UUID,
         grn_id: str,
         line_number: int,
-        line_data: InvoiceLine,
+        values: _LineValues,
         effective_from: date,
-        item_info: Dict[str, Any]
+        item_ref: UUID,
+        batch_number: str
     ) -> GRNLine:
         """Create GRN Line model with realistic data"""
         
         grn_line_id = self.id_gen.generate_grn_line_id(grn_id, line_number)
-        
-        # Extract quantities
-        received_qty = self.transformer.safe_float(line_data.quantity, precision=3)
-        unit_price = self.transformer.safe_float(line_data.unit_price, precision=4)
-        line_amount = self.transformer.safe_float(line_data.line_amount, precision=2)
-        
-        # Validate line amount
-        if line_amount == 0 and received_qty > 0 and unit_price > 0:
-            line_amount = round(received_qty * unit_price, 2)
+        received_qty = values.quantity
         
         # Initial acceptance (100% - no rejection at receipt)
         accepted_qty = received_qty
         rejected_qty = 0.0
         
-        # Generate batch number for materials
-        batch_number = self.id_gen.generate_batch_number(
-            material_code=item_info['hsn_code'],
-            manufacture_date=effective_from
-        )
-        
         # QC result - initially pending
         qc_result = 'PENDING'
         grn_line_status = 'RECEIVED'
         
         return GRNLine(
+            id=row_id,
+            created_at=now,
+            updated_at=now,
             s_grn_ref=grn_ref,
             s_grn_line_id=grn_line_id,
-            s_item_description=self.transformer.clean_string(
-                line_data.description or "UNKNOWN",
-                max_length=255
-            ) or "UNKNOWN",
-            s_item_ref=item_info['item_ref'],
+            s_item_description=values.clean_description,
+            s_item_ref=item_ref,
             s_received_qty=received_qty,
-            s_unit_price=unit_price,
-            s_total_received_amount=line_amount,
+            s_unit_price=values.unit_price,
+            s_total_received_amount=values.line_amount,
             s_accepted_qty=accepted_qty,
             s_rejected_qty=rejected_qty,
-            s_uom_id=item_info['uom'],
+            s_uom_id=values.uom,
             s_weight_uom='KG',
             s_qc_result=qc_result,
             s_grn_line_status=grn_line_status,
@@ -573,5 +652,5 @@ class OCRMapper:
             s_compliance_verified_flag=False,
             s_effective_from=effective_from,
             s_external_system='INVOICE_OCR',
-            s_external_system_id=str(line_number)[:10]
+            s_external_system_id=str(line_number)
         )
@@ -1,16 +1,228 @@
 """
 Master Data Service - Enterprise Solution
-FIXED: Removed all caching - uses proper INSERT ON CONFLICT pattern
+FIXED: No caching of upserted entities - uses proper INSERT ON CONFLICT pattern
 FIXED: Tax rate names now composite (e.g., IGST_18, CGST_SGST_18)
 VERIFIED: All column names match actual database schema from dump.txt
 """
-from typing import Optional, Dict, Any
-from uuid import UUID
-from datetime import datetime, date
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
+from uuid import UUID, uuid4
 
+from database.client import in_transaction
 from logs.log import logger
 
 
+# Statement texts are constant per entity, so each is one prepared statement;
+# tables resolve through the connection's search_path (settings.DB_SCHEMA)
+_COUNTRY_ID_SQL = """
+    SELECT s_country_id 
+    FROM s_country 
+    WHERE s_country_code = %s
+    LIMIT 1;
+"""
+
+
+_STATE_ID_SQL = """
+    SELECT s_state_id 
+    FROM s_state 
+    WHERE s_state_code = %s
+    LIMIT 1;
+"""
+
+
+# Whole reference tables, read once at startup by warmup()
+_ALL_COUNTRIES_SQL = """
+    SELECT s_country_code, s_country_id
+    FROM s_country;
+"""
+
+
+_ALL_STATES_SQL = """
+    SELECT s_state_code, s_state_id
+    FROM s_state;
+"""
+
+
+_SUPPLIER_SQL = """
+    INSERT INTO s_supplier (
+        id, is_deleted, created_at, updated_at,
+        s_supplier_id, s_supplier_code, s_legal_name, s_pan_number,
+        s_supplier_type, s_msme_flag,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, %s, %s,
+        'COMPANY', false,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_SUPPLIER_SITE_SQL = """
+    INSERT INTO s_supplier_site (
+        id, is_deleted, created_at, updated_at,
+        s_supplier_site_id, s_gstin, s_country_id, s_state_id,
+        s_building_name, s_floor_unit, s_city, s_pin_code,
+        s_supplier_ref, s_sez_flag, s_default_dispatch_flag, s_default_billing_flag,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, %s, %s,
+        'Default Building', 'Ground Floor', 'Delhi', '110001',
+        %s, false, true, true,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_LEGAL_ENTITY_SQL = """
+    INSERT INTO s_legal_entity (
+        id, is_deleted, created_at, updated_at,
+        s_legal_entity_id, s_legal_entity_name, s_legal_entity_pan,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, 'Default Legal Entity', %s,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_LEGAL_ENTITY_SITE_SQL = """
+    INSERT INTO s_legal_entity_site (
+        id, is_deleted, created_at, updated_at,
+        s_legal_entity_site_id, s_gstin, s_country_id, s_state_id,
+        s_building_name, s_floor_unit, s_city, s_pin_code,
+        s_legal_entity_ref, s_sez_flag, s_default_shipping_flag, s_default_billing_flag,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, %s, %s,
+        'Default Building', 'Ground Floor', 'Delhi', '110001',
+        %s, false, true, true,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+# One statement and one plan for the whole invoice, however many lines
+_ITEMS_BULK_SQL = """
+    INSERT INTO s_item (
+        id, is_deleted, created_at, updated_at,
+        s_item_id, s_item_code, s_item_name, s_item_category,
+        s_hsn_id, s_uom_id,
+        s_effective_from, s_effective_to
+    )
+    SELECT
+        u.id, false, now(), now(),
+        left(u.id::text, 36), left(u.id::text, 50), u.name, 'MATERIAL',
+        u.hsn, u.uom,
+        CURRENT_DATE, NULL
+    FROM unnest(%s::uuid[], %s::text[], %s::text[], %s::text[]) AS u(id, name, hsn, uom)
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_COST_CENTER_SQL = """
+    INSERT INTO s_cost_center (
+        id, is_deleted, created_at, updated_at,
+        s_cost_center_id, s_cost_center_code, s_cost_center_description,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, 'Default Cost Center',
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_PROFIT_CENTER_SQL = """
+    INSERT INTO s_profit_center (
+        id, is_deleted, created_at, updated_at,
+        s_profit_center_id, s_profit_center_code,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_PROJECT_SQL = """
+    INSERT INTO s_project_wbs (
+        id, is_deleted, created_at, updated_at,
+        s_project_id, s_project_code,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_PLANT_SQL = """
+    INSERT INTO s_plant (
+        id, is_deleted, created_at, updated_at,
+        s_plant_id, s_plant_code, s_plant_description,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, 'Default Plant',
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+_GL_ACCOUNT_SQL = """
+    INSERT INTO s_gl_account (
+        id, is_deleted, created_at, updated_at,
+        s_gl_account_id, s_gl_account_code, s_gl_account_description,
+        s_gl_account_type,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s, 'Inventory Account', 'ASSET',
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (id) DO NOTHING;
+"""
+
+
+# DO NOTHING takes no lock on an existing row; RETURNING is then empty and
+# the id is read with _TAX_RATE_ID_SQL
+_TAX_RATE_INSERT_SQL = """
+    INSERT INTO s_tax_rate (
+        id, is_deleted, created_at, updated_at,
+        s_tax_rate_id, s_tax_rate_name,
+        s_effective_from, s_effective_to
+    ) VALUES (
+        %s, false, now(), now(),
+        %s, %s,
+        CURRENT_DATE, NULL
+    )
+    ON CONFLICT (s_tax_rate_name) DO NOTHING
+    RETURNING id;
+"""
+
+
+_TAX_RATE_ID_SQL = """
+    SELECT id
+    FROM s_tax_rate
+    WHERE s_tax_rate_name = %s
+    LIMIT 1;
+"""
+
+
 class MasterDataService:
     """Service for inserting master data entities using enterprise best practices"""
     
@@ -22,44 +234,93 @@ class MasterDataService:
             run_query_func: Async function to execute database queries
         """
         self.run_query = run_query_func
-        self.schema = "tenant_data"
+        # Country/state reference data does not change at runtime, so
+        # code -> ID lookups are remembered once found
+        self._country_cache: Dict[str, str] = {}
+        self._state_cache: Dict[str, str] = {}
+        self._default_site_location: Optional[Tuple[str, str]] = None
+        # Tax rate name -> id, only for rows known to be committed
+        self._tax_rate_cache: Dict[str, UUID] = {}
+    
+    async def warmup(self) -> None:
+        """
+        Load every country and state code into the lookup caches
+        
+        Call once at startup so no invoice pays for the lookups; codes
+        missing here are still looked up (and cached) on first use.
+        """
+        # Outside a transaction each query borrows its own pooled connection
+        countries, states = await asyncio.gather(
+            self.run_query(_ALL_COUNTRIES_SQL),
+            self.run_query(_ALL_STATES_SQL)
+        )
+        for row in countries:
+            self._country_cache[row['s_country_code']] = row['s_country_id']
+        for row in states:
+            self._state_cache[row['s_state_code']] = row['s_state_id']
+        
+        await self.default_site_location()
+        logger.info(
+            "Reference data cached: %d countries, %d states",
+            len(self._country_cache), len(self._state_cache)
+        )
     
     async def _get_country_id_by_code(self, country_code: str) -> Optional[str]:
         """Get country ID by country code"""
-        query = f"""
-            SELECT s_country_id 
-            FROM {self.schema}.s_country 
-            WHERE s_country_code = '{country_code}'
-            LIMIT 1;
-        """
-        result = await self.run_query(query)
+        country_id = self._country_cache.get(country_code)
+        if country_id is not None:
+            return country_id
+        
+        result = await self.run_query(_COUNTRY_ID_SQL, (country_code,))
         
         if result:
-            country_id = result[0]['s_country_id']
-            logger.info(f"✓ Found country ID for '{country_code}': {country_id}")
+            country_id = self._country_cache[country_code] = result[0]['s_country_id']
+            logger.debug("✓ Found country ID for '%s': %s", country_code, country_id)
             return country_id
         
-        logger.warning(f"⚠️ No country found for code '{country_code}'")
+        logger.warning("⚠️ No country found for code '%s'", country_code)
         return None
     
     async def _get_state_id_by_code(self, state_code: str) -> Optional[str]:
         """Get state ID by state code"""
-        query = f"""
-            SELECT s_state_id 
-            FROM {self.schema}.s_state 
-            WHERE s_state_code = '{state_code}'
-            LIMIT 1;
-        """
-        result = await self.run_query(query)
+        state_id = self._state_cache.get(state_code)
+        if state_id is not None:
+            return state_id
+        
+        result = await self.run_query(_STATE_ID_SQL, (state_code,))
         
         if result:
-            state_id = result[0]['s_state_id']
-            logger.info(f"✓ Found state ID for '{state_code}': {state_id}")
+            state_id = self._state_cache[state_code] = result[0]['s_state_id']
+            logger.debug("✓ Found state ID for '%s': %s", state_code, state_id)
             return state_id
         
-        logger.warning(f"⚠️ No state found for code '{state_code}'")
+        logger.warning("⚠️ No state found for code '%s'", state_code)
         return None
     
+    async def default_site_location(self) -> Tuple[str, str]:
+        """
+        Country and state IDs given to every new site (India / Delhi)
+        
+        Resolve these before opening the invoice transaction: inside it
+        every query shares one connection, so the two lookups would run
+        one after the other, and the pipelined site inserts cannot wait on
+        a lookup anyway. Once both codes are found the pair is kept, so
+        later invoices skip the database entirely.
+        
+        Returns:
+            Tuple of (country_id, state_id), with fallbacks when missing
+        """
+        if self._default_site_location is not None:
+            return self._default_site_location
+        
+        country_id, state_id = await asyncio.gather(
+            self._get_country_id_by_code('IN'),
+            self._get_state_id_by_code('DL')
+        )
+        if country_id is not None and state_id is not None:
+            self._default_site_location = (country_id, state_id)
+        return country_id or 'COUNTRY31', state_id or 'STATE7'
+    
     async def ensure_supplier(
         self,
         supplier_ref: UUID,
@@ -71,28 +332,13 @@ class MasterDataService:
         # Extract PAN from GSTIN (first 10 chars) or use default
         pan_number = supplier_gstn[:10] if supplier_gstn and len(supplier_gstn) >= 10 else "AAAPZ1234C"
         
-        # INSERT ON CONFLICT DO NOTHING - enterprise pattern
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_supplier (
-                id, is_deleted, created_at, updated_at,
-                s_supplier_id, s_supplier_code, s_legal_name, s_pan_number,
-                s_supplier_type, s_msme_flag,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{supplier_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(supplier_ref)[:36]}',
-                '{str(supplier_ref)[:20]}',
-                '{self._escape_string(supplier_name[:255])}',
-                '{pan_number}',
-                'COMPANY', false,
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.info(f"✓ Supplier ensured: {supplier_name} (PAN: {pan_number})")
+        supplier_ref_str = str(supplier_ref)
+        await self.run_query(_SUPPLIER_SQL, (
+            supplier_ref,
+            supplier_ref_str, supplier_ref_str[:20],
+            supplier_name[:255], pan_number
+        ))
+        logger.debug("✓ Supplier ensured: %s (PAN: %s)", supplier_name, pan_number)
         return supplier_ref
     
     async def ensure_supplier_site(
@@ -100,42 +346,22 @@ class MasterDataService:
         site_ref: UUID,
         supplier_ref: UUID,
         address: Optional[str] = None,
-        gstin: Optional[str] = None
+        gstin: Optional[str] = None,
+        country_id: Optional[str] = None,
+        state_id: Optional[str] = None
     ) -> UUID:
         """Ensure supplier site exists using INSERT ON CONFLICT"""
         
-        # Get default country and state
-        country_id = await self._get_country_id_by_code('IN') or 'COUNTRY31'
-        state_id = await self._get_state_id_by_code('DL') or 'STATE7'
-        
-        # INSERT ON CONFLICT DO NOTHING
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_supplier_site (
-                id, is_deleted, created_at, updated_at,
-                s_supplier_site_id, s_gstin, s_country_id, s_state_id,
-                s_building_name, s_floor_unit, s_city, s_pin_code,
-                s_supplier_ref, s_sez_flag, s_default_dispatch_flag, s_default_billing_flag,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{site_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(site_ref)[:36]}',
-                {self._format_string(gstin)},
-                '{country_id}',
-                '{state_id}',
-                'Default Building',
-                'Ground Floor',
-                'Delhi',
-                '110001',
-                '{supplier_ref}',
-                false, true, true,
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
+        # Get default country and state unless the caller resolved them
+        if country_id is None or state_id is None:
+            country_id, state_id = await self.default_site_location()
         
-        await self.run_query(insert_query)
-        logger.info(f"✓ Supplier site ensured: {site_ref} (GSTIN: {gstin})")
+        await self.run_query(_SUPPLIER_SITE_SQL, (
+            site_ref,
+            str(site_ref), gstin or None, country_id, state_id,
+            supplier_ref
+        ))
+        logger.debug("✓ Supplier site ensured: %s (GSTIN: %s)", site_ref, gstin)
         return site_ref
     
     async def ensure_legal_entity(
@@ -148,25 +374,11 @@ class MasterDataService:
         # Extract PAN from GSTIN or use default
         pan = gstin[:10] if gstin and len(gstin) >= 10 else "AAAPZ9999C"
         
-        # INSERT ON CONFLICT DO NOTHING
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_legal_entity (
-                id, is_deleted, created_at, updated_at,
-                s_legal_entity_id, s_legal_entity_name, s_legal_entity_pan,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{entity_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(entity_ref)[:36]}',
-                'Default Legal Entity',
-                '{pan}',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.info(f"✓ Legal entity ensured: {entity_ref} (PAN: {pan})")
+        await self.run_query(_LEGAL_ENTITY_SQL, (
+            entity_ref,
+            str(entity_ref), pan
+        ))
+        logger.debug("✓ Legal entity ensured: %s (PAN: %s)", entity_ref, pan)
         return entity_ref
     
     async def ensure_legal_entity_site(
@@ -174,192 +386,104 @@ class MasterDataService:
         site_ref: UUID,
         entity_ref: UUID,
         address: Optional[str] = None,
-        gstin: Optional[str] = None
+        gstin: Optional[str] = None,
+        country_id: Optional[str] = None,
+        state_id: Optional[str] = None
     ) -> UUID:
         """Ensure legal entity site exists using INSERT ON CONFLICT"""
         
-        # Get default country and state
-        country_id = await self._get_country_id_by_code('IN') or 'COUNTRY31'
-        state_id = await self._get_state_id_by_code('DL') or 'STATE7'
-        
-        # INSERT ON CONFLICT DO NOTHING
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_legal_entity_site (
-                id, is_deleted, created_at, updated_at,
-                s_legal_entity_site_id, s_gstin, s_country_id, s_state_id,
-                s_building_name, s_floor_unit, s_city, s_pin_code,
-                s_legal_entity_ref, s_sez_flag, s_default_shipping_flag, s_default_billing_flag,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{site_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(site_ref)[:36]}',
-                {self._format_string(gstin)},
-                '{country_id}',
-                '{state_id}',
-                'Default Building',
-                'Ground Floor',
-                'Delhi',
-                '110001',
-                '{entity_ref}',
-                false, true, true,
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
+        # Get default country and state unless the caller resolved them
+        if country_id is None or state_id is None:
+            country_id, state_id = await self.default_site_location()
         
-        await self.run_query(insert_query)
-        logger.info(f"✓ Legal entity site ensured: {site_ref} (GSTIN: {gstin})")
+        await self.run_query(_LEGAL_ENTITY_SITE_SQL, (
+            site_ref,
+            str(site_ref), gstin or None, country_id, state_id,
+            entity_ref
+        ))
+        logger.debug("✓ Legal entity site ensured: %s (GSTIN: %s)", site_ref, gstin)
         return site_ref
     
-    async def ensure_item(
-        self,
-        item_ref: UUID,
-        description: str,
-        hsn_code: str,
-        uom: str = "EA"
-    ) -> UUID:
-        """Ensure item exists using INSERT ON CONFLICT"""
-        
-        # INSERT ON CONFLICT DO NOTHING
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_item (
-                id, is_deleted, created_at, updated_at,
-                s_item_id, s_item_code, s_item_name, s_item_category,
-                s_hsn_id, s_uom_id,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{item_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(item_ref)[:36]}',
-                '{str(item_ref)[:50]}',
-                '{self._escape_string(description[:255])}',
-                'MATERIAL',
-                '{hsn_code}',
-                '{uom}',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
+    async def ensure_items_bulk(self, items: List[Dict[str, Any]]) -> None:
         """
+        Ensure many items exist with one INSERT ... SELECT unnest(...)
         
-        await self.run_query(insert_query)
-        logger.debug(f"✓ Item ensured: {description[:50]} (HSN: {hsn_code})")
-        return item_ref
+        Args:
+            items: Item dicts with item_ref, description, hsn_code and uom
+                (the mapper's item_info); repeated item_refs are sent once
+        """
+        ids, names, hsn_codes, uoms = [], [], [], []
+        seen = set()
+        for item in items:
+            item_ref = item['item_ref']
+            if item_ref in seen:
+                continue
+            seen.add(item_ref)
+            ids.append(item_ref)
+            names.append(item['description'][:255])
+            hsn_codes.append(item['hsn_code'])
+            uoms.append(item.get('uom', 'EA'))
+        
+        if not ids:
+            return
+        
+        await self.run_query(_ITEMS_BULK_SQL, (ids, names, hsn_codes, uoms))
+        logger.debug("✓ %d items ensured", len(ids))
     
     async def ensure_cost_center(self, cost_center_ref: UUID) -> UUID:
         """Ensure cost center exists using INSERT ON CONFLICT"""
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_cost_center (
-                id, is_deleted, created_at, updated_at,
-                s_cost_center_id, s_cost_center_code, s_cost_center_description,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{cost_center_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(cost_center_ref)[:36]}',
-                '{str(cost_center_ref)[:20]}',
-                'Default Cost Center',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.debug(f"✓ Cost center ensured: {cost_center_ref}")
+        cost_center_ref_str = str(cost_center_ref)
+        await self.run_query(_COST_CENTER_SQL, (
+            cost_center_ref,
+            cost_center_ref_str, cost_center_ref_str[:20]
+        ))
+        logger.debug("✓ Cost center ensured: %s", cost_center_ref)
         return cost_center_ref
     
     async def ensure_profit_center(self, profit_center_ref: UUID) -> UUID:
         """Ensure profit center exists using INSERT ON CONFLICT"""
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_profit_center (
-                id, is_deleted, created_at, updated_at,
-                s_profit_center_id, s_profit_center_code,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{profit_center_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(profit_center_ref)[:36]}',
-                '{str(profit_center_ref)[:20]}',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.debug(f"✓ Profit center ensured: {profit_center_ref}")
+        profit_center_ref_str = str(profit_center_ref)
+        await self.run_query(_PROFIT_CENTER_SQL, (
+            profit_center_ref,
+            profit_center_ref_str, profit_center_ref_str[:20]
+        ))
+        logger.debug("✓ Profit center ensured: %s", profit_center_ref)
         return profit_center_ref
     
     async def ensure_project(self, project_ref: UUID) -> UUID:
         """Ensure project exists using INSERT ON CONFLICT
         NOTE: Table is s_project_wbs not s_project!"""
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_project_wbs (
-                id, is_deleted, created_at, updated_at,
-                s_project_id, s_project_code,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{project_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(project_ref)[:36]}',
-                '{str(project_ref)[:20]}',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.debug(f"✓ Project ensured: {project_ref}")
+        project_ref_str = str(project_ref)
+        await self.run_query(_PROJECT_SQL, (
+            project_ref,
+            project_ref_str, project_ref_str[:20]
+        ))
+        logger.debug("✓ Project ensured: %s", project_ref)
         return project_ref
     
     async def ensure_plant(self, plant_ref: UUID) -> UUID:
         """Ensure plant exists using INSERT ON CONFLICT"""
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_plant (
-                id, is_deleted, created_at, updated_at,
-                s_plant_id, s_plant_code, s_plant_description,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{plant_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(plant_ref)[:36]}',
-                '{str(plant_ref)[:20]}',
-                'Default Plant',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.debug(f"✓ Plant ensured: {plant_ref}")
+        plant_ref_str = str(plant_ref)
+        await self.run_query(_PLANT_SQL, (
+            plant_ref,
+            plant_ref_str, plant_ref_str[:20]
+        ))
+        logger.debug("✓ Plant ensured: %s", plant_ref)
         return plant_ref
     
     async def ensure_gl_account(self, gl_account_ref: UUID) -> UUID:
         """Ensure GL account exists using INSERT ON CONFLICT"""
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_gl_account (
-                id, is_deleted, created_at, updated_at,
-                s_gl_account_id, s_gl_account_code, s_gl_account_description,
-                s_gl_account_type,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{gl_account_ref}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(gl_account_ref)[:36]}',
-                '{str(gl_account_ref)[:20]}',
-                'Inventory Account',
-                'ASSET',
-                '{date.today()}', NULL
-            )
-            ON CONFLICT (id) DO NOTHING;
-        """
-        
-        await self.run_query(insert_query)
-        logger.debug(f"✓ GL account ensured: {gl_account_ref}")
+        gl_account_ref_str = str(gl_account_ref)
+        await self.run_query(_GL_ACCOUNT_SQL, (
+            gl_account_ref,
+            gl_account_ref_str, gl_account_ref_str[:20]
+        ))
+        logger.debug("✓ GL account ensured: %s", gl_account_ref)
         return gl_account_ref
     
     async def ensure_tax_rate(self, tax_rate_name: str) -> UUID:
@@ -367,71 +491,30 @@ class MasterDataService:
         Ensure tax rate exists by NAME (unique constraint)
         Returns the UUID of the tax rate (existing or newly created)
         
-        ENTERPRISE PATTERN: 
-        1. Try to find by name (unique constraint)
-        2. If not found, insert with new UUID
-        3. If duplicate name error, retry SELECT
-        """
-        
-        # Step 1: Try to find existing by name
-        select_query = f"""
-            SELECT id 
-            FROM {self.schema}.s_tax_rate 
-            WHERE s_tax_rate_name = '{self._escape_string(tax_rate_name)}'
-            LIMIT 1;
+        Call it outside the invoice transaction: the insert then commits
+        at once, so concurrent invoices with the same rate never wait on
+        each other, and existing rows are only read, never locked. Names
+        seen before are answered from memory without a query.
         """
+        tax_rate_id = self._tax_rate_cache.get(tax_rate_name)
+        if tax_rate_id is not None:
+            return tax_rate_id
         
-        result = await self.run_query(select_query)
-        
-        if result:
-            tax_rate_id = result[0]['id']
-            logger.debug(f"✓ Tax rate already exists: {tax_rate_name} -> {tax_rate_id}")
-            return UUID(tax_rate_id)
-        
-        # Step 2: Not found, insert with new UUID
-        from uuid import uuid4
         new_tax_rate_id = uuid4()
+        result = await self.run_query(_TAX_RATE_INSERT_SQL, (
+            new_tax_rate_id,
+            str(new_tax_rate_id), tax_rate_name
+        ))
         
-        insert_query = f"""
-            INSERT INTO {self.schema}.s_tax_rate (
-                id, is_deleted, created_at, updated_at,
-                s_tax_rate_id, s_tax_rate_name,
-                s_effective_from, s_effective_to
-            ) VALUES (
-                '{new_tax_rate_id}', false,
-                '{datetime.now()}', '{datetime.now()}',
-                '{str(new_tax_rate_id)[:36]}',
-                '{self._escape_string(tax_rate_name)}',
-                '{date.today()}', NULL
-            );
-        """
-        
-        try:
-            await self.run_query(insert_query)
-            logger.info(f"✓ Tax rate created: {tax_rate_name} -> {new_tax_rate_id}")
-            return new_tax_rate_id
-        except Exception as e:
-            # If unique constraint violation (someone inserted between our SELECT and INSERT)
-            # Retry the SELECT
-            error_msg = str(e).lower()
-            if 'duplicate' in error_msg or 'unique' in error_msg:
-                logger.info(f"Tax rate '{tax_rate_name}' was created concurrently, fetching ID...")
-                result = await self.run_query(select_query)
-                if result:
-                    tax_rate_id = result[0]['id']
-                    logger.info(f"✓ Tax rate found after retry: {tax_rate_name} -> {tax_rate_id}")
-                    return UUID(tax_rate_id)
-            
-            # If it's some other error, re-raise
-            logger.error(f"Failed to ensure tax rate '{tax_rate_name}': {e}")
-            raise
-    
-    def _format_string(self, s: Optional[str]) -> str:
-        """Format string for PostgreSQL"""
-        if s is None or s == "":
-            return "NULL"
-        return f"'{self._escape_string(s)}'"
-    
-    def _escape_string(self, s: str) -> str:
-        """Escape single quotes in strings"""
-        return s.replace("'", "''")
+        if result:
+            logger.info("✓ Tax rate created: %s -> %s", tax_rate_name, result[0]['id'])
+        else:
+            # Already there, or just committed by a concurrent insert
+            result = await self.run_query(_TAX_RATE_ID_SQL, (tax_rate_name,))
+            logger.debug("✓ Tax rate already exists: %s -> %s", tax_rate_name, result[0]['id'])
+        
+        tax_rate_id = result[0]['id']
+        # Inside a transaction a new row vanishes again on rollback
+        if not in_transaction():
+            self._tax_rate_cache[tax_rate_name] = tax_rate_id
+        return tax_rate_id
@@ -1,8 +1,9 @@
 """
 Main invoice processor - orchestrates OCR data processing and database insertion
 """
-from typing import Dict, Any
-from pydantic import ValidationError
+import asyncio
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Iterable, Union
+from pydantic import BaseModel, ValidationError
 
 from models.ocr_input import OCRInput
 from services.mapper import OCRMapper
@@ -10,25 +11,61 @@ from services.database import DatabaseService
 from logs.log import logger
 
 
+# Raw OCR dict, one JSON document as bytes, validated OCRInput, or any
+# model exposing dynamic/static
+InvoiceData = Union[Dict[str, Any], bytes, OCRInput, BaseModel]
+
+
 class InvoiceProcessor:
     """Main processor for invoice automation"""
     
-    def __init__(self, run_query_func):
+    def __init__(
+        self,
+        run_query_func,
+        run_many_func,
+        transaction_func=None,
+        pipeline_func=None,
+        max_concurrency: int = 8,
+        line_buffer=None
+    ):
         """
-        Initialize processor with database query function
+        Initialize processor with database query functions
         
         Args:
             run_query_func: Async function to execute database queries
+            run_many_func: Async function to execute batched row inserts
+            transaction_func: Async context manager factory scoping queries
+                to one transaction (see database.client.transaction)
+            pipeline_func: Async context manager factory batching
+                write-only statements (see database.client.pipeline)
+            max_concurrency: Maximum invoices writing to the database at
+                once across this processor (single, batch and stream
+                requests alike); keep at or below the connection pool size
+            line_buffer: Optional BufferedInserter (see database.buffer);
+                PO conditions and GRN lines are then written after the
+                response, while PO lines stay in the invoice transaction
         """
         self.mapper = OCRMapper()
-        self.db_service = DatabaseService(run_query_func)
+        self.db_service = DatabaseService(
+            run_query_func, run_many_func, transaction_func, pipeline_func,
+            line_buffer=line_buffer
+        )
+        self.max_concurrency = max_concurrency
+        # Shared by every request: each invoice holds a pooled connection
+        # for its whole transaction, so the cap must be process-wide
+        self._db_slots = asyncio.Semaphore(max_concurrency)
     
-    async def process_invoice(self, ocr_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def warmup(self) -> None:
+        """Cache reference data before the first invoice arrives"""
+        await self.db_service.master_data_service.warmup()
+    
+    async def process_invoice(self, ocr_data: InvoiceData) -> Dict[str, Any]:
         """
         Process OCR invoice data and insert into database
         
         Args:
-            ocr_data: Dictionary containing 'dynamic' and 'static' invoice data
+            ocr_data: Invoice data with 'dynamic' and 'static' parts, either
+                as a dict or as a model exposing them as attributes
             
         Returns:
             Dictionary with processing results
@@ -39,27 +76,28 @@ class InvoiceProcessor:
         """
         try:
             # Step 1: Validate input data
-            logger.info("Starting invoice processing")
+            logger.debug("Starting invoice processing")
             validated_input = self._validate_input(ocr_data)
             
             # Step 2: Map OCR data to database models
-            logger.info("Mapping OCR data to database models")
+            logger.debug("Mapping OCR data to database models")
             (po_header, po_lines, po_conditions, grn_header, grn_lines,
              supplier_info, buyer_info, item_info) = \
                 self.mapper.map_to_database_models(validated_input)
             
             # Step 3: Insert into database (master data first, then transactional)
-            logger.info("Inserting data into database")
-            results = await self.db_service.insert_complete_invoice(
-                po_header=po_header,
-                po_lines=po_lines,
-                po_conditions=po_conditions,
-                grn_header=grn_header,
-                grn_lines=grn_lines,
-                supplier_info=supplier_info,
-                buyer_info=buyer_info,
-                item_info=item_info
-            )
+            logger.debug("Inserting data into database")
+            async with self._db_slots:
+                results = await self.db_service.insert_complete_invoice(
+                    po_header=po_header,
+                    po_lines=po_lines,
+                    po_conditions=po_conditions,
+                    grn_header=grn_header,
+                    grn_lines=grn_lines,
+                    supplier_info=supplier_info,
+                    buyer_info=buyer_info,
+                    item_info=item_info
+                )
             
             # Step 4: Prepare response
             response = {
@@ -74,7 +112,11 @@ class InvoiceProcessor:
                     "grn_lines_inserted": results["grn_lines_count"],
                     "po_header_id": results["po_header_id"],
                     "po_lines_inserted": results["po_lines_count"],
-                    "po_conditions_inserted": results["po_conditions_count"]
+                    "po_conditions_inserted": results["po_conditions_count"],
+                    # Non-zero only with INSERT_BUFFER_ENABLED: rows handed
+                    # to the background inserter, not yet in the database
+                    "po_conditions_queued": results["po_conditions_queued"],
+                    "grn_lines_queued": results["grn_lines_queued"]
                 },
                 "errors": results["errors"]
             }
@@ -103,12 +145,15 @@ class InvoiceProcessor:
                 "errors": [str(e)]
             }
     
-    def _validate_input(self, ocr_data: Dict[str, Any]) -> OCRInput:
+    def _validate_input(self, ocr_data: InvoiceData) -> OCRInput:
         """
         Validate OCR input data
         
+        Models are read by attribute, so request models are never dumped
+        back to a dict just to be re-validated
+        
         Args:
-            ocr_data: Raw OCR data dictionary
+            ocr_data: Raw OCR data dictionary, JSON bytes or request model
             
         Returns:
             Validated OCRInput model
@@ -116,21 +161,127 @@ class InvoiceProcessor:
         Raises:
             ValidationError: If validation fails
         """
+        if isinstance(ocr_data, OCRInput):
+            return ocr_data
+        
         try:
-            return OCRInput(**ocr_data)
+            if isinstance(ocr_data, dict):
+                return OCRInput(**ocr_data)
+            if isinstance(ocr_data, bytes):
+                # Parsed and validated in one pass by pydantic-core
+                return OCRInput.model_validate_json(ocr_data)
+            return OCRInput(dynamic=ocr_data.dynamic, static=ocr_data.static)
         except ValidationError as e:
             logger.error("OCR data validation failed: %s", e)
             raise
     
+    async def _process_batch_entry(
+        self,
+        idx: int,
+        invoice_data: Union[InvoiceData, Exception]
+    ) -> Dict[str, Any]:
+        """Process one invoice of a batch and build its summary entry"""
+        if isinstance(invoice_data, Exception):
+            # The source could not read this entry (e.g. an oversized line)
+            logger.error("Invoice %d unreadable: %s", idx, invoice_data)
+            return {
+                "index": idx,
+                "grn_number": None,
+                "status": "failed",
+                "errors": [str(invoice_data)]
+            }
+        
+        logger.debug("Processing invoice %d", idx)
+        result = await self.process_invoice(invoice_data)
+        return {
+            "index": idx,
+            "grn_number": result.get("grn_number"),
+            "status": result["status"],
+            "errors": result.get("errors", [])
+        }
+    
+    async def iter_batch_invoices(
+        self,
+        invoice_list: Iterable[InvoiceData]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process multiple invoices, yielding each result as soon as it finishes
+        
+        Args:
+            invoice_list: OCR data dictionaries or request models
+            
+        Yields:
+            Per-invoice result entries in completion order
+        """
+        # Database concurrency is capped by the processor-wide _db_slots
+        tasks = [
+            asyncio.ensure_future(self._process_batch_entry(idx, invoice_data))
+            for idx, invoice_data in enumerate(invoice_list, start=1)
+        ]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer went away early (e.g. client disconnect)
+            for task in tasks:
+                task.cancel()
+    
+    async def iter_stream_invoices(
+        self,
+        invoices: AsyncIterable[Union[InvoiceData, Exception]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process invoices pulled from an async source, yielding each result
+        
+        Unlike iter_batch_invoices the input is consumed lazily: at most
+        max_concurrency invoices are read ahead of their results, so memory
+        stays bounded however long the source is.
+        
+        Args:
+            invoices: Async iterable of invoices (e.g. NDJSON lines as bytes);
+                an Exception item marks an unreadable entry, reported as failed
+            
+        Yields:
+            Per-invoice result entries in completion order
+        """
+        pending = set()
+        idx = 0
+        
+        try:
+            async for invoice_data in invoices:
+                if len(pending) >= self.max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+                
+                idx += 1
+                pending.add(
+                    asyncio.ensure_future(self._process_batch_entry(idx, invoice_data))
+                )
+            
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            # Consumer went away early (e.g. client disconnect)
+            for task in pending:
+                task.cancel()
+    
     async def process_batch_invoices(
         self, 
-        invoice_list: list[Dict[str, Any]]
+        invoice_list: list[InvoiceData],
+        single_transaction: bool = False
     ) -> Dict[str, Any]:
         """
         Process multiple invoices in batch
         
         Args:
-            invoice_list: List of OCR data dictionaries
+            invoice_list: List of OCR data dictionaries or request models
+            single_transaction: Commit the whole batch once at the end.
+                Invoices then run one after another on a single connection;
+                a failed invoice is rolled back to its own savepoint.
             
         Returns:
             Summary of batch processing
@@ -142,22 +293,22 @@ class InvoiceProcessor:
             "invoices": []
         }
         
-        for idx, invoice_data in enumerate(invoice_list, start=1):
-            logger.info(f"Processing invoice {idx}/{len(invoice_list)}")
-            
-            result = await self.process_invoice(invoice_data)
-            
-            if result["status"] == "success":
+        def _record(entry: Dict[str, Any]) -> None:
+            results["invoices"].append(entry)
+            if entry["status"] == "success":
                 results["successful"] += 1
             else:
                 results["failed"] += 1
-            
-            results["invoices"].append({
-                "index": idx,
-                "grn_number": result.get("grn_number"),
-                "status": result["status"],
-                "errors": result.get("errors", [])
-            })
+        
+        if single_transaction:
+            async with self.db_service.transaction():
+                for idx, invoice_data in enumerate(invoice_list, start=1):
+                    _record(await self._process_batch_entry(idx, invoice_data))
+        else:
+            async for entry in self.iter_batch_invoices(invoice_list):
+                _record(entry)
+        
+        results["invoices"].sort(key=lambda entry: entry["index"])
         
         logger.info(
             "Batch processing completed: total=%d, successful=%d, failed=%d",
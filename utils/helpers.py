@@ -6,11 +6,26 @@ FIXED: Removed ALL caching from ReferenceResolver - each call generates new UUID
 from datetime import datetime, date, timedelta
 from uuid import UUID, uuid4
 import hashlib
+import os
 import random
-from typing import Optional, Any
+from typing import List, Optional, Any
 from decimal import Decimal
 
 
+# Date formats accepted from OCR, tried in order
+_DATE_FORMATS = (
+    "%d-%b-%Y",  # 15-Aug-2025
+    "%d/%m/%Y",  # 15/08/2025
+    "%Y-%m-%d",  # 2025-08-15
+    "%d-%m-%Y",  # 15-08-2025
+    "%d.%m.%Y",  # 15.08.2025 (European)
+    "%m/%d/%Y",  # 08/15/2025 (US)
+)
+
+# ISO currency codes accepted as-is
+_VALID_CURRENCIES = frozenset({'INR', 'USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'SGD'})
+
+
 class IDGenerator:
     """
     Generate unique IDs following enterprise ERP patterns
@@ -71,6 +86,15 @@ class IDGenerator:
         checksum = sum(int(d) for d in grn_number) % 10
         return f"{grn_number}{fiscal_year}{checksum}"
     
+    @staticmethod
+    def bulk_generate(n: int) -> List[UUID]:
+        """
+        Generate n random (version 4) UUIDs from a single urandom read
+        Cheaper than n uuid4() calls, which read urandom once each
+        """
+        buf = os.urandom(16 * n)
+        return [UUID(bytes=buf[i * 16:(i + 1) * 16], version=4) for i in range(n)]
+    
     @staticmethod
     def generate_grn_line_id(grn_id: str, line_number: int) -> str:
         """
@@ -161,6 +185,17 @@ class IDGenerator:
         suffix = random.randint(100, 999)
         
         return f"B{year_2digit:02d}{day_of_year:03d}{suffix}"
+    
+    @staticmethod
+    def generate_batch_numbers(n: int, manufacture_date: date) -> List[str]:
+        """
+        Generate n batch numbers sharing one manufacture date
+        Same B-YYDDD-XXX format as generate_batch_number, with the date
+        prefix computed once and a random suffix per batch
+        """
+        prefix = f"B{manufacture_date.year % 100:02d}{manufacture_date.timetuple().tm_yday:03d}"
+        randint = random.randint
+        return [f"{prefix}{randint(100, 999)}" for _ in range(n)]
 
 
 class DataTransformer:
@@ -178,16 +213,7 @@ class DataTransformer:
         # Clean the input
         date_str = str(date_str).strip()
         
-        formats = [
-            "%d-%b-%Y",  # 15-Aug-2025
-            "%d/%m/%Y",  # 15/08/2025
-            "%Y-%m-%d",  # 2025-08-15
-            "%d-%m-%Y",  # 15-08-2025
-            "%d.%m.%Y",  # 15.08.2025 (European)
-            "%m/%d/%Y",  # 08/15/2025 (US)
-        ]
-        
-        for fmt in formats:
+        for fmt in _DATE_FORMATS:
             try:
                 return datetime.strptime(date_str, fmt).date()
             except ValueError:
@@ -456,6 +482,14 @@ class ReferenceResolver:
         """
         return uuid4()
     
+    def resolve_tax_rate_ref(self, rate: float = 0.0) -> UUID:
+        """
+        Resolve tax rate reference
+        In production: Query TAX_RATE table by rate
+        FIXED: No caching - generates fresh UUID each time
+        """
+        return uuid4()
+    
     def resolve_gl_account_ref(self, account_code: Optional[str] = None) -> UUID:
         """
         Resolve GL account reference
@@ -470,5 +504,5 @@ class ReferenceResolver:
         Returns ISO currency code
         """
         # Validate currency code
-        valid_currencies = ['INR', 'USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'SGD']
-        return currency_code.upper() if currency_code.upper() in valid_currencies else 'INR'
+        currency_code = currency_code.upper()
+        return currency_code if currency_code in _VALID_CURRENCIES else 'INR'